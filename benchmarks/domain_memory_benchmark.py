@@ -0,0 +1,84 @@
+"""Mede a memória por container carregado com e sem __slots__, com o mesmo formato de dados.
+
+Uso: python -m benchmarks.domain_memory_benchmark
+
+As classes "sem slots" repetem os atributos dos modelos atuais (inclusive os
+horários de última busca no lugar do histórico embutido), guardados em __dict__;
+assim a diferença medida é apenas a dos __slots__.
+"""
+import gc
+import tracemalloc
+from datetime import datetime
+from src.domain.container import Container, Event
+from src.enums.EventStatus import EventStatus
+from src.enums.Shipowners import Shipowners
+from src.enums.ShippingStatus import ShippingStatus
+
+class DictEvent:
+    """Mesmos atributos de Event, em __dict__ por instância"""
+    def __init__(self, order, location, un_location_code, description, detail=None, status=None, estimated_date=None, effective_date=None):
+        self.order = order
+        self.estimated_date = estimated_date
+        self.effective_date = effective_date
+        self.location = location
+        self.un_location_code = un_location_code
+        self.description = description
+        self.detail = detail
+        self.status = status
+
+class DictEventCollection:
+    def __init__(self, events):
+        self._by_order = {e.order: e for e in events}
+        self._is_sorted = False
+
+class DictContainer:
+    """Mesmos atributos de Container, em __dict__ por instância"""
+    def __init__(self, number, shipowner, shipped_from, shipped_to, port_of_load, port_of_discharge, shipping_status=None, events=None, booking_number=None, master_bill_of_lading_number=None, house_bill_of_lading_number=None, last_successful_update=None, last_failed_update=None, payload_fingerprint=None, version=0, _id=None):
+        self._id = _id
+        self.version = version
+        self.number = number
+        self.shipped_from = shipped_from
+        self.shipped_to = shipped_to
+        self.port_of_load = port_of_load
+        self.port_of_discharge = port_of_discharge
+        self.booking_number = booking_number
+        self.master_bill_of_lading_number = master_bill_of_lading_number
+        self.house_bill_of_lading_number = house_bill_of_lading_number
+        self.events = DictEventCollection(events or [])
+        self.last_successful_update = last_successful_update
+        self.last_failed_update = last_failed_update
+        self.payload_fingerprint = payload_fingerprint
+        self.shipping_status = shipping_status
+        self.shipowner = shipowner
+        self._changes = None
+
+def build(container_class, event_class):
+    def builder(index: int, event_count: int):
+        events = [
+            event_class(order, "SANTOS, BR", "BRSSZ", "Export Loaded on Vessel", ["MSC ANNA", "NX123A"], EventStatus.EFFECTIVE, None, "01/01/2025")
+            for order in range(event_count)
+        ]
+        return container_class(f"MSCU{index:07d}", Shipowners.MSC, "SANTOS, BR", "VALENCIA, ES", "SANTOS, BR", "VALENCIA, ES", ShippingStatus.PROCESSING, events, "BOOK1", "MEDU1", "HBL1", datetime(2025, 1, 1), None, None, _id=str(index))
+    return builder
+
+def measure(builder, count: int, event_count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    containers = [builder(index, event_count) for index in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del containers
+    return current / count
+
+def main():
+    count = 2000
+    without_slots = build(DictContainer, DictEvent)
+    with_slots = build(Container, Event)
+    print(f"{'eventos':>8} | {'sem slots (bytes)':>17} | {'com slots (bytes)':>17} | {'redução':>8}")
+    for event_count in (0, 10, 60):
+        before = measure(without_slots, count, event_count)
+        after = measure(with_slots, count, event_count)
+        print(f"{event_count:>8} | {before:>17.0f} | {after:>17.0f} | {1 - after / before:>7.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compara o MscResponseParser com a conversão anterior do ContainerMapper.
+
+Uso: python -m benchmarks.msc_response_parser_benchmark
+"""
+import random
+import timeit
+from datetime import datetime, timedelta
+from src.mappers.msc_response_parser import MscResponseParser
+from src.models.container_dto import ContainerDTO, EventDTO
+
+def legacy_from_api_response_to_dto_model(response_data):
+    """Implementação anterior: strptime até duas vezes por evento e datetime.now() a cada data"""
+    try:
+        bl_data = response_data["Data"]["BillOfLadings"][0]
+        container_data = bl_data["ContainersInfo"][0]
+
+        return ContainerDTO(
+            number=container_data.get("ContainerNumber", ""),
+            master_bill_of_lading_number=bl_data.get("BillOfLadingNumber", ""),
+            shipped_from=bl_data.get("GeneralTrackingInfo", {}).get("ShippedFrom", ""),
+            shipped_to=bl_data.get("GeneralTrackingInfo", {}).get("ShippedTo", ""),
+            port_of_load=bl_data.get("GeneralTrackingInfo", {}).get("PortOfLoad", ""),
+            port_of_discharge=bl_data.get("GeneralTrackingInfo", {}).get("PortOfDischarge", ""),
+            events=[
+                EventDTO(
+                    order=event.get("Order", 0),
+                    location=event.get("Location", ""),
+                    un_location_code=event.get("UnLocationCode", "") or "",
+                    description=event.get("Description", ""),
+                    detail = (event.get("Detail") or [None]) if (event.get("Detail") or [None])[0] is not None else None,
+                    estimated_date=event.get("Date", "") if datetime.strptime(event.get("Date", ""), "%d/%m/%Y") > datetime.now() or "Estimated" in event.get("Description", "") else None,
+                    effective_date=event.get("Date", "") if datetime.strptime(event.get("Date", ""), "%d/%m/%Y") <= datetime.now() and "Estimated" not in event.get("Description", "") else None
+                ) for event in container_data.get("Events", [])
+            ]
+        )
+    except KeyError as e:
+        print(f"Erro ao processar a resposta da API: chave ausente {e}")
+        return None
+
+def build_response(event_count: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=event_count)
+    events = []
+    for order in range(event_count, 0, -1):
+        date = start + timedelta(days=event_count - order + rng.randint(0, 3))
+        events.append({
+            "Order": order,
+            "Date": date.strftime("%d/%m/%Y"),
+            "Location": "SANTOS, BR",
+            "UnLocationCode": "BRSSZ",
+            "Description": rng.choice(["Export Loaded on Vessel", "Estimated Time of Arrival", "Discharged from vessel"]),
+            "Detail": rng.choice([["MSC ANNA", "NX123A"], [None], None]),
+        })
+    return {
+        "IsSuccess": True,
+        "Data": {"BillOfLadings": [{
+            "BillOfLadingNumber": "MEDUAB123456",
+            "GeneralTrackingInfo": {
+                "ShippedFrom": "SANTOS, BR",
+                "ShippedTo": "VALENCIA, ES",
+                "PortOfLoad": "SANTOS, BR",
+                "PortOfDischarge": "VALENCIA, ES",
+            },
+            "ContainersInfo": [{"ContainerNumber": "MSCU1234567", "Events": events}],
+        }]},
+    }
+
+def as_tuples(dto: ContainerDTO):
+    return [
+        (e.order, e.location, e.un_location_code, e.description, e.detail, e.estimated_date, e.effective_date)
+        for e in dto.events
+    ]
+
+def main():
+    parser = MscResponseParser()
+    print(f"{'eventos':>8} | {'anterior (ms)':>13} | {'parser (ms)':>11} | {'ganho':>6}")
+    for event_count in (10, 50, 200, 1000):
+        response = build_response(event_count)
+        assert as_tuples(legacy_from_api_response_to_dto_model(response)) == as_tuples(parser.parse(response))
+
+        repeat = max(1, 20000 // event_count)
+        legacy = min(timeit.repeat(lambda: legacy_from_api_response_to_dto_model(response), number=repeat, repeat=3)) / repeat
+        parsed = min(timeit.repeat(lambda: parser.parse(response), number=repeat, repeat=3)) / repeat
+        print(f"{event_count:>8} | {legacy * 1000:>13.3f} | {parsed * 1000:>11.3f} | {legacy / parsed:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
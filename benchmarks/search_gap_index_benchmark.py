@@ -0,0 +1,80 @@
+"""Compara a alocação de horários por varredura ordenada com o SearchGapIndex.
+
+Uso: python -m benchmarks.search_gap_index_benchmark
+"""
+import random
+import time as clock
+from datetime import time
+from typing import List
+from src.domain.search_gap_index import SearchGapIndex, time_to_seconds, seconds_to_time
+
+START = time(8, 0, 0)
+END = time(20, 0, 0)
+
+def legacy_next_search_time(search_times: List[time]) -> time:
+    """Algoritmo anterior: ordena todos os horários e varre todos os intervalos"""
+    sorted_times = sorted(search_times)
+    if len(sorted_times) < 2:
+        return END
+    max_gap = 0
+    max_gap_index = 0
+    for i in range(len(sorted_times) - 1):
+        gap = time_to_seconds(sorted_times[i + 1]) - time_to_seconds(sorted_times[i])
+        if gap > max_gap:
+            max_gap = gap
+            max_gap_index = i
+    mid = (time_to_seconds(sorted_times[max_gap_index]) + time_to_seconds(sorted_times[max_gap_index + 1])) // 2
+    return seconds_to_time(mid)
+
+def run_legacy(operations) -> List[time]:
+    search_times = {"C0": START}
+    allocated = []
+    for operation, number in operations:
+        if operation == "add":
+            search_times[number] = legacy_next_search_time(list(search_times.values()))
+            allocated.append(search_times[number])
+        else:
+            search_times.pop(number, None)
+    return allocated
+
+def run_index(operations) -> List[time]:
+    gap_index = SearchGapIndex(END, [("C0", START)])
+    allocated = []
+    for operation, number in operations:
+        if operation == "add":
+            allocated.append(gap_index.allocate(number))
+        else:
+            gap_index.remove(number)
+    return allocated
+
+def build_operations(size: int, seed: int = 42):
+    rng = random.Random(seed)
+    operations = []
+    active = []
+    for i in range(1, size + 1):
+        number = f"C{i}"
+        operations.append(("add", number))
+        active.append(number)
+        # Cerca de 10% das inclusões são seguidas pela finalização de um container
+        if rng.random() < 0.1 and len(active) > 2:
+            operations.append(("remove", active.pop(rng.randrange(len(active)))))
+    return operations
+
+def main():
+    print(f"{'containers':>10} | {'varredura (s)':>13} | {'gap index (s)':>13} | {'ganho':>7}")
+    for size in (1000, 2000, 4000, 8000):
+        operations = build_operations(size)
+
+        started = clock.perf_counter()
+        legacy = run_legacy(operations)
+        legacy_elapsed = clock.perf_counter() - started
+
+        started = clock.perf_counter()
+        indexed = run_index(operations)
+        index_elapsed = clock.perf_counter() - started
+
+        assert legacy == indexed, "As alocações divergiram do algoritmo anterior"
+        print(f"{size:>10} | {legacy_elapsed:>13.4f} | {index_elapsed:>13.4f} | {legacy_elapsed / index_elapsed:>6.0f}x")
+
+if __name__ == "__main__":
+    main()
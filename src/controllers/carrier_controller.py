@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from src.services.msc_service import MscService, get_msc_service
+
+router = APIRouter()
+
+@router.get("/carriers/msc/cache-stats")
+async def get_msc_cache_stats(service: MscService = Depends(get_msc_service)):
+    return {"message": "Estatísticas do cache de rastreio da MSC", "data": service.cache_stats()}
+
+@router.get("/carriers/msc/circuit")
+async def get_msc_circuit(service: MscService = Depends(get_msc_service)):
+    return {"message": "Estado do disjuntor das consultas à MSC", "data": service.circuit_stats()}
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response, status
 from src.models.container_create import ContainerCreate
 from src.models.container_update import ContainerUpdate
 from src.services.container_service import ContainerService, get_container_service
-from typing import List, Optional
+from typing import List, Literal, Optional
+from fastapi.responses import StreamingResponse
+from src.infrastructure.http.etag import etag_matches
 from src.models.grid_paginated_response import GridPaginatedResponse
 
 router = APIRouter()
@@ -17,21 +19,66 @@ async def create_container(container: ContainerCreate, service: ContainerService
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro inesperado: {str(e)}")
 
+@router.post("/containers/bulk")
+async def create_containers(containers: List[ContainerCreate], service: ContainerService = Depends(get_container_service)):
+    try:
+        return await service.register_containers(containers)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro inesperado: {str(e)}")
+
+@router.get("/containers/export")
+async def export_containers(
+    search: Optional[str] = Query(None),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    per_event: bool = Query(False, description="Uma linha por evento em vez de uma por container"),
+    service: ContainerService = Depends(get_container_service)
+):
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"containers{'_events' if per_event else ''}.{format}"
+    return StreamingResponse(
+        service.export_containers(search, format, per_event),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/containers/{id}")
-async def get_container(id: str, service: ContainerService = Depends(get_container_service)):
+async def get_container(
+    id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service: ContainerService = Depends(get_container_service)
+):
+    if if_none_match:
+        etag = await service.get_container_etag(id)
+        if etag is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
     container = await service.get_container_by_id(id)
     if container:
+        response.headers["ETag"] = service.container_etag(id, container.version)
+        response.headers["Cache-Control"] = "private, no-cache"
         return {"message": "Container encontrado", "data": container}
     return {"message": "Container não encontrado", "data": None}
 
 @router.get("/containers", response_model=GridPaginatedResponse)
 async def get_container_grid(
+    response: Response,
     search: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None, description="Token opaco retornado em next_cursor"),
+    if_none_match: Optional[str] = Header(None),
     container_service: ContainerService = Depends(get_container_service)
 ):
-    return await container_service.get_paginated_grid(search, page, page_size)
+    if if_none_match:
+        etag = await container_service.get_grid_etag(search, page, page_size, cursor)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    result = await container_service.get_paginated_grid(search, page, page_size, cursor)
+    response.headers["ETag"] = result["etag"]
+    response.headers["Cache-Control"] = "private, no-cache"
+    return result
 
 @router.delete("/containers/{id}", status_code=status.HTTP_200_OK)
 async def delete_container(id: str, service: ContainerService = Depends(get_container_service)):
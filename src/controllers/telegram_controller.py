@@ -0,0 +1,19 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, status
+
+router = APIRouter()
+
+@router.post("/telegram/webhook")
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+):
+    telegram_bot = getattr(request.app.state, "telegram_bot", None)
+    if telegram_bot is None or not telegram_bot.uses_webhook:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook do Telegram desativado.")
+    if not hmac.compare_digest((x_telegram_bot_api_secret_token or "").encode(), telegram_bot.webhook_secret.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token secreto inválido.")
+
+    await telegram_bot.process_webhook_update(await request.json())
+    return {"ok": True}
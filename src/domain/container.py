@@ -1,16 +1,38 @@
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 from src.enums.SearchStatus import SearchStatus
 from src.enums.ShippingStatus import ShippingStatus
 from src.enums.Shipowners import Shipowners
 from src.enums.EventStatus import EventStatus
+from src.domain.search_tokens import build_search_tokens
 from datetime import datetime
 
 class SearchLog:
+    __slots__ = ("timestamp", "status")
+
     def __init__(self, timestamp: datetime, status: SearchStatus):
         self.timestamp = timestamp
         self.status = status
 
+    def __eq__(self, other):
+        if not isinstance(other, SearchLog):
+            return NotImplemented
+        return self.timestamp == other.timestamp and self.status == other.status
+
+    def __hash__(self):
+        return hash((self.timestamp, self.status))
+
 class Event:
+    __slots__ = (
+        "order",
+        "estimated_date",
+        "effective_date",
+        "location",
+        "un_location_code",
+        "description",
+        "detail",
+        "status",
+    )
+
     def __init__(
         self,
         order: int,
@@ -53,6 +75,28 @@ class Event:
         )
         event.set_event_status()
         return event
+
+    def as_tuple(self) -> tuple:
+        """Valores comparáveis do evento, no mesmo formato de EventDTO.as_tuple"""
+        return (
+            self.order,
+            self.estimated_date,
+            self.effective_date,
+            self.location,
+            self.un_location_code,
+            self.description,
+            self.detail,
+            self.status,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        # A ordem identifica o evento dentro do container e não muda após a criação
+        return hash(self.order)
     
     def set_event_status(self):
         if self.effective_date is not None:
@@ -60,8 +104,99 @@ class Event:
         else:
             self.status = EventStatus.ESTIMATED
 
-    
+
+class EventCollection:
+    """Eventos indexados por ordem: busca, inclusão e remoção em O(1), iteração em ordem crescente.
+
+    Um único dicionário guarda os eventos; como dicionários preservam a ordem de
+    inserção, ele só é reordenado na primeira leitura após uma inclusão fora de ordem.
+    """
+    __slots__ = ("_by_order", "_is_sorted")
+
+    def __init__(self, events: Iterable[Event] = ()):
+        self._by_order: Dict[int, Event] = {e.order: e for e in events}
+        self._is_sorted = False
+
+    def _sorted(self) -> Dict[int, Event]:
+        if not self._is_sorted:
+            self._by_order = dict(sorted(self._by_order.items()))
+            self._is_sorted = True
+        return self._by_order
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._sorted().values())
+
+    def __reversed__(self) -> Iterator[Event]:
+        return reversed(self._sorted().values())
+
+    def __len__(self) -> int:
+        return len(self._by_order)
+
+    def __contains__(self, order: int) -> bool:
+        return order in self._by_order
+
+    def get(self, order: int) -> Optional[Event]:
+        return self._by_order.get(order)
+
+    def add(self, event: Event) -> bool:
+        if event.order in self._by_order:
+            return False
+        if self._is_sorted and self._by_order and event.order < next(reversed(self._by_order)):
+            self._is_sorted = False
+        self._by_order[event.order] = event
+        return True
+
+    def remove(self, order: int) -> Optional[Event]:
+        return self._by_order.pop(order, None)
+
+    def last(self) -> Optional[Event]:
+        return next(reversed(self), None)
+
+
+class ContainerChanges:
+    """Alterações pendentes de um container desde a última escrita no banco"""
+    __slots__ = ("fields", "added_events", "updated_events", "removed_events", "search_logs")
+
+    def __init__(self):
+        self.fields: Set[str] = set()
+        self.added_events: Dict[int, Event] = {}
+        self.updated_events: Set[int] = set()
+        self.removed_events: Set[int] = set()
+        self.search_logs: List[SearchLog] = []
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.fields or self.added_events or self.updated_events
+            or self.removed_events or self.search_logs
+        )
+
+
 class Container:
+    SEARCHABLE_FIELDS = (
+        "number",
+        "booking_number",
+        "master_bill_of_lading_number",
+        "house_bill_of_lading_number",
+    )
+    # Tupla fixa: a ordem dos slots (e o layout das instâncias) não depende do hash das strings
+    _TRACKED_FIELD_ORDER = (
+        "number",
+        "shipped_from",
+        "shipped_to",
+        "port_of_load",
+        "port_of_discharge",
+        "booking_number",
+        "master_bill_of_lading_number",
+        "house_bill_of_lading_number",
+        "shipping_status",
+        "shipowner",
+        "last_successful_update",
+        "last_failed_update",
+        "payload_fingerprint",
+    )
+    TRACKED_FIELDS = frozenset(_TRACKED_FIELD_ORDER)
+    __slots__ = _TRACKED_FIELD_ORDER + ("_id", "version", "events", "_changes")
+
     def __init__(
         self,
         number: str,
@@ -75,10 +210,15 @@ class Container:
         booking_number: Optional[str] = None,
         master_bill_of_lading_number: Optional[str] = None,
         house_bill_of_lading_number: Optional[str] = None,
-        search_logs: Optional[List[SearchLog]] = None,
+        last_successful_update: Optional[datetime] = None,
+        last_failed_update: Optional[datetime] = None,
+        payload_fingerprint: Optional[str] = None,
+        version: int = 0,
         _id: Optional[str] = None
     ):
         self._id = _id or None
+        # Revisão do documento, incrementada pelo repositório a cada escrita
+        self.version = version
         self.number = number
         self.shipped_from = shipped_from
         self.shipped_to = shipped_to
@@ -87,10 +227,53 @@ class Container:
         self.booking_number = booking_number
         self.master_bill_of_lading_number = master_bill_of_lading_number
         self.house_bill_of_lading_number = house_bill_of_lading_number
-        self.events = events or []
-        self.search_logs = search_logs or []
+        self.events = events if isinstance(events, EventCollection) else EventCollection(events or [])
+        self.last_successful_update = last_successful_update
+        self.last_failed_update = last_failed_update
+        self.payload_fingerprint = payload_fingerprint
         self.shipping_status= shipping_status
         self.shipowner = shipowner
+        # A partir daqui as alterações são rastreadas; o registro é criado na primeira delas
+        self._changes = None
+
+    def __setattr__(self, name, value):
+        if name in self.TRACKED_FIELDS and hasattr(self, "_changes") and getattr(self, name, None) != value:
+            self._pending_changes().fields.add(name)
+        super().__setattr__(name, value)
+
+    def _pending_changes(self) -> ContainerChanges:
+        if self._changes is None:
+            self._changes = ContainerChanges()
+        return self._changes
+
+    def __eq__(self, other):
+        if not isinstance(other, Container):
+            return NotImplemented
+        return self._id == other._id and self.number == other.number
+
+    def __hash__(self):
+        return hash(self.number)
+
+    @property
+    def changes(self) -> ContainerChanges:
+        return self._changes if self._changes is not None else ContainerChanges()
+
+    def clear_changes(self):
+        self._changes = None
+
+    @property
+    def latest_effective_description(self) -> str:
+        """Descrição do evento efetivo de maior ordem, exibida no grid"""
+        latest_event = next((e for e in reversed(self.events) if e.effective_date is not None), None)
+        return latest_event.description if latest_event else ""
+
+    @property
+    def search_tokens(self) -> List[str]:
+        """Tokens indexados usados na busca do grid pelos números do container"""
+        return build_search_tokens(getattr(self, field) for field in self.SEARCHABLE_FIELDS)
+
+    def get_event(self, order: int) -> Optional[Event]:
+        return self.events.get(order)
 
     @classmethod
     def build(
@@ -126,7 +309,6 @@ class Container:
                         detail=event.detail or []
                     ) for event in events_dto
                 ] or [],
-            search_logs = [],
             shipping_status = None,
             shipowner = shipowner
         )
@@ -135,14 +317,19 @@ class Container:
         
     
     def add_search_log(self, status: SearchStatus):
+        # O histórico fica na coleção de logs; o container guarda só os últimos horários
         log = SearchLog(timestamp=datetime.now(), status=status)
-        self.search_logs.append(log)
+        if status is SearchStatus.SUCCESS:
+            self.last_successful_update = log.timestamp
+        else:
+            self.last_failed_update = log.timestamp
+        self._pending_changes().search_logs.append(log)
     
     def set_shipping_status(self):
-        if self.events:
-            last_event = max(self.events, key=lambda e: e.order)
+        last_event = self.events.last()
 
         is_empty_received = (
+            last_event is not None and
             last_event.description == "Empty received at CY" and
             " ".join(last_event.detail) == "EMPTY" and last_event.status is EventStatus.EFFECTIVE
         )
@@ -153,23 +340,28 @@ class Container:
             self.shipping_status = ShippingStatus.PROCESSING
     
     def add_event(self, event: Event):
-        if any(e.order == event.order for e in self.events):
+        if event.order in self.events:
             return
 
-        self.events.append(
-            Event.build(
-                order=event.order,
-                estimated_date=event.estimated_date,
-                effective_date=event.effective_date,
-                location=event.location,
-                un_location_code=event.un_location_code or "",
-                description=event.description or "",
-                detail=event.detail or []
-            )
+        new_event = Event.build(
+            order=event.order,
+            estimated_date=event.estimated_date,
+            effective_date=event.effective_date,
+            location=event.location,
+            un_location_code=event.un_location_code or "",
+            description=event.description or "",
+            detail=event.detail or []
         )
+        self.events.add(new_event)
+        self._pending_changes().added_events[new_event.order] = new_event
     
     def remove_event_by_order(self, order: int):
-        self.events = [e for e in self.events if e.order != order]
+        if self.events.remove(order) is None:
+            return
+        changes = self._pending_changes()
+        changes.updated_events.discard(order)
+        if changes.added_events.pop(order, None) is None:
+            changes.removed_events.add(order)
                 
     def update_event(
         self, 
@@ -180,7 +372,7 @@ class Container:
         detail: List[str],
         estimated_date: Optional[str] = None,
         effective_date: Optional[str] = None, ):
-        event = next((e for e in self.events if e.order == order), None)
+        event = self.get_event(order)
         if event:
             event.estimated_date = estimated_date
             event.effective_date = effective_date
@@ -193,6 +385,9 @@ class Container:
             if event.detail != detail:
                 event.detail = detail
             event.set_event_status()
+            changes = self._pending_changes()
+            if order not in changes.added_events:
+                changes.updated_events.add(order)
     
     def update(
         self,
@@ -0,0 +1,66 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from src.domain.container import Container
+from src.enums.EventStatus import EventStatus
+from src.enums.ShippingStatus import ShippingStatus
+from src.mappers.msc_response_parser import parse_msc_date
+
+# Estimativa vencida sem virar efetiva: o armador deve atualizar a qualquer momento
+OVERDUE_INTERVAL = timedelta(hours=4)
+# Estimativa vencida há muito tempo provavelmente foi abandonada pelo armador
+STALE_OVERDUE_AFTER = timedelta(days=7)
+IMMINENT_WINDOW_DAYS = 2
+IMMINENT_INTERVAL = timedelta(hours=6)
+APPROACHING_WINDOW_DAYS = 7
+APPROACHING_INTERVAL = timedelta(hours=12)
+# Longo trecho marítimo: entre 1 e 4 dias, acordando ao entrar na janela de 7 dias
+MIN_SEA_LEG_DAYS = 1
+MAX_SEA_LEG_DAYS = 4
+DEFAULT_INTERVAL_DAYS = 1
+
+def _parse_event_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return parse_msc_date(value).date()
+    except ValueError:
+        return None
+
+def _is_stale(estimate: date, now: datetime) -> bool:
+    return now - datetime.combine(estimate, time.min) > STALE_OVERDUE_AFTER
+
+def next_pending_estimate(container: Container, now: datetime) -> Optional[date]:
+    """Data estimada mais próxima entre os eventos que ainda não se tornaram efetivos,
+    ignorando as vencidas há mais de STALE_OVERDUE_AFTER (abandonadas pelo armador)"""
+    estimates = [
+        _parse_event_date(event.estimated_date)
+        for event in container.events
+        if event.status is not EventStatus.EFFECTIVE
+    ]
+    estimates = [estimate for estimate in estimates if estimate is not None and not _is_stale(estimate, now)]
+    return min(estimates, default=None)
+
+def next_search_at(container: Container, now: datetime, search_time: time) -> Optional[datetime]:
+    """Próxima busca do container conforme a fase da viagem; None quando a viagem terminou.
+
+    Intervalos de um dia ou mais caem no horário diário do container (search_time),
+    mantendo a distribuição feita pelo agendamento.
+    """
+    if container.shipping_status is ShippingStatus.FINISHED:
+        return None
+
+    now = now.replace(second=0, microsecond=0)
+    estimate = next_pending_estimate(container, now)
+    if estimate is None:
+        return datetime.combine(now.date() + timedelta(days=DEFAULT_INTERVAL_DAYS), search_time)
+
+    days_until = (estimate - now.date()).days
+    if days_until < 0:
+        return now + OVERDUE_INTERVAL
+    if days_until <= IMMINENT_WINDOW_DAYS:
+        return now + IMMINENT_INTERVAL
+    if days_until <= APPROACHING_WINDOW_DAYS:
+        return now + APPROACHING_INTERVAL
+
+    interval_days = min(MAX_SEA_LEG_DAYS, max(MIN_SEA_LEG_DAYS, days_until - APPROACHING_WINDOW_DAYS))
+    return datetime.combine(now.date() + timedelta(days=interval_days), search_time)
@@ -0,0 +1,148 @@
+import heapq
+from datetime import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def time_to_seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+def seconds_to_time(seconds: int) -> time:
+    return time(hour=seconds // 3600, minute=(seconds % 3600) // 60, second=seconds % 60)
+
+class SearchGapIndex:
+    """Mantém os intervalos entre horários de busca em uma fila de prioridade.
+
+    Os horários distintos formam uma lista duplamente encadeada (por dicionários)
+    e os intervalos entre vizinhos ficam em um heap de máximo com remoção
+    preguiçosa. Alocar o ponto médio do maior intervalo e remover um horário
+    custam O(log n), produzindo a mesma alocação da varredura ordenada.
+    """
+
+    def __init__(self, end_search_time: time, entries: Iterable[Tuple[str, time]] = (), version=None):
+        self.end_search_time = end_search_time
+        self.version = version
+        self._by_number: Dict[str, int] = {}
+        self._counts: Dict[int, int] = {}
+        self._prev: Dict[int, Optional[int]] = {}
+        self._next: Dict[int, Optional[int]] = {}
+        self._gaps: List[Tuple[int, int, int]] = []
+
+        for container_number, search_time in entries:
+            seconds = time_to_seconds(search_time)
+            self._by_number[container_number] = seconds
+            self._counts[seconds] = self._counts.get(seconds, 0) + 1
+
+        ordered = sorted(self._counts)
+        previous = None
+        for seconds in ordered:
+            self._prev[seconds] = previous
+            self._next[seconds] = None
+            if previous is not None:
+                self._next[previous] = seconds
+                self._gaps.append((previous - seconds, previous, seconds))
+            previous = seconds
+        heapq.heapify(self._gaps)
+
+    def __len__(self) -> int:
+        return len(self._by_number)
+
+    def __contains__(self, container_number: str) -> bool:
+        return container_number in self._by_number
+
+    def _is_valid_gap(self, start: int, end: int) -> bool:
+        return start in self._counts and self._next.get(start) == end
+
+    def _push_gap(self, start: int, end: int) -> None:
+        heapq.heappush(self._gaps, (start - end, start, end))
+        if len(self._gaps) > 2 * len(self._counts) + 16:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._gaps = [gap for gap in self._gaps if self._is_valid_gap(gap[1], gap[2])]
+        heapq.heapify(self._gaps)
+
+    def _max_gap(self) -> Optional[Tuple[int, int]]:
+        while self._gaps:
+            _, start, end = self._gaps[0]
+            if self._is_valid_gap(start, end):
+                return start, end
+            heapq.heappop(self._gaps)
+        return None
+
+    def _insert_after(self, start: int, seconds: int) -> None:
+        end = self._next[start]
+        self._prev[seconds] = start
+        self._next[seconds] = end
+        self._next[start] = seconds
+        if end is not None:
+            self._prev[end] = seconds
+            self._push_gap(seconds, end)
+        self._push_gap(start, seconds)
+
+    def next_search_time(self) -> time:
+        """Horário que seria alocado para o próximo container"""
+        if len(self) < 2:
+            return self.end_search_time
+        gap = self._max_gap()
+        if gap is None:
+            # Todos os containers compartilham o mesmo horário
+            return seconds_to_time(next(iter(self._counts)))
+        start, end = gap
+        return seconds_to_time((start + end) // 2)
+
+    def add(self, container_number: str, search_time: time) -> None:
+        """Registra um horário alocado por next_search_time (ou já existente no índice)"""
+        seconds = time_to_seconds(search_time)
+        self._by_number[container_number] = seconds
+        if seconds in self._counts:
+            self._counts[seconds] += 1
+            return
+
+        self._counts[seconds] = 1
+        gap = self._max_gap()
+        if gap is not None and gap[0] < seconds < gap[1]:
+            self._insert_after(gap[0], seconds)
+            return
+
+        # Horário fora do maior intervalo: localiza o vizinho percorrendo a lista (caso raro)
+        previous = None
+        for candidate in self._counts:
+            if candidate < seconds and (previous is None or candidate > previous):
+                previous = candidate
+        if previous is not None:
+            self._insert_after(previous, seconds)
+            return
+
+        following = None
+        for candidate in self._counts:
+            if candidate > seconds and (following is None or candidate < following):
+                following = candidate
+        self._prev[seconds] = None
+        self._next[seconds] = following
+        if following is not None:
+            self._prev[following] = seconds
+            self._push_gap(seconds, following)
+
+    def allocate(self, container_number: str) -> time:
+        search_time = self.next_search_time()
+        self.add(container_number, search_time)
+        return search_time
+
+    def remove(self, container_number: str) -> bool:
+        seconds = self._by_number.pop(container_number, None)
+        if seconds is None:
+            return False
+
+        self._counts[seconds] -= 1
+        if self._counts[seconds] > 0:
+            return True
+
+        del self._counts[seconds]
+        previous = self._prev.pop(seconds)
+        following = self._next.pop(seconds)
+        if previous is not None:
+            self._next[previous] = following
+        if following is not None:
+            self._prev[following] = previous
+        if previous is not None and following is not None:
+            self._push_gap(previous, following)
+        return True
@@ -1,10 +1,30 @@
-from datetime import time
+from datetime import datetime, time
 from typing import List, Optional
 
+DEFAULT_START_SEARCH_TIME = time(8, 0, 0)
+DEFAULT_END_SEARCH_TIME = time(20, 0, 0)
+
 class ContainerSchedule:
-    def __init__(self, container_number: str, search_time: time):
+    __slots__ = ("container_number", "search_time", "next_search_at")
+
+    def __init__(self, container_number: str, search_time: time, next_search_at: Optional[datetime] = None):
         self.container_number = container_number
+        # Horário diário do container, distribuído pelo agendamento
         self.search_time = search_time
+        # Próxima busca calculada pela política de frequência; None usa o horário diário
+        self.next_search_at = next_search_at
+
+    def __eq__(self, other):
+        if not isinstance(other, ContainerSchedule):
+            return NotImplemented
+        return (
+            self.container_number == other.container_number
+            and self.search_time == other.search_time
+            and self.next_search_at == other.next_search_at
+        )
+
+    def __hash__(self):
+        return hash(self.container_number)
 
 class SearchScheduling:
     def __init__(self, start_search_time: time, end_search_time: time, containers: List[ContainerSchedule] = None, _id: Optional[str] = None):
@@ -0,0 +1,29 @@
+import re
+from typing import Iterable, List, Optional
+
+SEARCH_GRAM_SIZE = 3
+_NON_ALPHANUMERIC = re.compile(r"[^0-9A-Z]")
+
+def normalize_identifier(value: Optional[str]) -> str:
+    """Deixa o identificador em maiúsculas e apenas com letras e dígitos"""
+    return _NON_ALPHANUMERIC.sub("", (value or "").upper())
+
+def build_search_tokens(values: Iterable[Optional[str]]) -> List[str]:
+    """Gera os n-gramas (1 a SEARCH_GRAM_SIZE caracteres) de todos os identificadores"""
+    tokens = set()
+    for value in values:
+        normalized = normalize_identifier(value)
+        for size in range(1, SEARCH_GRAM_SIZE + 1):
+            for start in range(len(normalized) - size + 1):
+                tokens.add(normalized[start:start + size])
+    return sorted(tokens)
+
+def build_query_tokens(search: Optional[str]) -> List[str]:
+    """Tokens que um identificador precisa conter para casar com a busca por substring"""
+    normalized = normalize_identifier(search)
+    if len(normalized) <= SEARCH_GRAM_SIZE:
+        return [normalized] if normalized else []
+    return sorted({
+        normalized[start:start + SEARCH_GRAM_SIZE]
+        for start in range(len(normalized) - SEARCH_GRAM_SIZE + 1)
+    })
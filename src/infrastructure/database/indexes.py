@@ -0,0 +1,48 @@
+from typing import Dict, List
+from pymongo import ASCENDING, IndexModel
+from src.infrastructure.database.connection import db
+
+# Índices exigidos pelas consultas da aplicação, por coleção
+REQUIRED_INDEXES: Dict[str, List[IndexModel]] = {
+    "containers": [
+        # get_by_number, get_all_by_number e get_by_number_to_telegram (prefixo number)
+        IndexModel([("number", ASCENDING), ("shipping_status", ASCENDING)], name="number_shipping_status"),
+        IndexModel([("shipowner", ASCENDING), ("shipping_status", ASCENDING)], name="shipowner_shipping_status"),
+        # Busca agrupada por BL no agendador
+        IndexModel(
+            [("master_bill_of_lading_number", ASCENDING), ("shipping_status", ASCENDING)],
+            name="master_bill_of_lading_number_shipping_status"
+        ),
+        # Busca do grid por substring dos identificadores
+        IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+    ],
+    "container_schedules": [
+        IndexModel([("container_number", ASCENDING)], name="container_number", unique=True),
+        # Consulta dos agendamentos de uma janela de horário diário (find_due)
+        IndexModel([("search_time", ASCENDING)], name="search_time"),
+        # Reserva dos agendamentos vencidos no modo distribuído
+        IndexModel([("next_search_at", ASCENDING), ("lease_expires_at", ASCENDING)], name="next_search_at_lease_expires_at"),
+    ],
+    "search_log_rollups": [
+        IndexModel([("container_id", ASCENDING), ("day", ASCENDING)], name="container_id_day", unique=True),
+    ],
+    "subscriptions": [
+        IndexModel([("chat_id", ASCENDING), ("container_id", ASCENDING)], name="chat_id_container_id", unique=True),
+        # Chats inscritos nos containers alterados
+        IndexModel([("container_id", ASCENDING)], name="container_id"),
+    ],
+    "notification_outbox": [
+        # Leitura das pendentes pelo despachante
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING), ("created_at", ASCENDING)], name="status_next_attempt_at"),
+        # Reserva das notificações de um chat
+        IndexModel([("chat_id", ASCENDING), ("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="chat_id_status_next_attempt_at"),
+        # Notificações enviadas expiram depois de 7 dias
+        IndexModel([("sent_at", ASCENDING)], name="sent_at_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+async def ensure_indexes(database=db) -> None:
+    """Cria os índices declarados; create_indexes é idempotente para definições iguais"""
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        await database[collection_name].create_indexes(indexes)
+        print(f"Índices garantidos para a coleção {collection_name}.")
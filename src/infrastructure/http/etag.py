@@ -0,0 +1,22 @@
+import hashlib
+from typing import Iterable, Optional
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+def make_digest_etag(parts: Iterable) -> str:
+    """ETag de uma coleção de revisões, resumida num hash curto"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"|")
+    return make_etag(digest.hexdigest())
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o If-None-Match com o ETag atual (comparação fraca, aceita lista e '*')"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """Limite de taxa por balde de fichas: até `capacity` de uma vez, repondo `rate` por segundo"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Esvazia o balde para que nada seja liberado pelos próximos `seconds` segundos"""
+        self._refill()
+        self._tokens = -seconds * self.rate
+
+    @property
+    def has_tokens(self) -> bool:
+        self._refill()
+        return self._tokens >= 1
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.capacity
@@ -0,0 +1,88 @@
+import time
+from collections import deque
+
+class CircuitOpenError(Exception):
+    """Chamada recusada sem tentativa porque o circuito está aberto"""
+
+class CircuitBreaker:
+    """Abre o circuito quando a taxa de erro da janela recente passa do limite.
+
+    Aberto, recusa as chamadas por `open_seconds`; depois deixa passar uma única
+    chamada de teste (meio aberto), que fecha o circuito se der certo ou o reabre.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate_threshold: float, window_size: int, min_calls: int, open_seconds: float):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_until = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() >= self._opened_until:
+            return self.HALF_OPEN
+        return self._state
+
+    def seconds_until_retry(self) -> float:
+        """Tempo até a próxima chamada de teste; 0 quando o circuito aceita chamadas"""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_until - time.monotonic())
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._close()
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._state == self.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.min_calls:
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                self._open()
+
+    def release_probe(self) -> None:
+        """Libera a chamada de teste cancelada sem resultado"""
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_until = time.monotonic() + self.open_seconds
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def _close(self) -> None:
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "seconds_until_retry": round(self.seconds_until_retry(), 1),
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False),
+            "times_opened": self.times_opened
+        }
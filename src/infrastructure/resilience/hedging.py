@@ -0,0 +1,32 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+async def hedged(
+        operation: Callable[[], Awaitable[Any]],
+        delay: float,
+        max_requests: int = 2,
+        can_hedge: Optional[Callable[[], bool]] = None) -> Any:
+    """Dispara uma nova cópia da operação a cada `delay` segundos sem resposta, até
+    `max_requests`, e retorna o primeiro sucesso; as cópias restantes são canceladas.
+
+    A operação deve levantar exceção ao falhar: uma cópia que falha não encerra as
+    demais. `can_hedge` permite vetar novas cópias (ex.: disjuntor fora do estado fechado).
+    """
+    tasks = [asyncio.ensure_future(operation())]
+    last_error = None
+    try:
+        while tasks:
+            may_hedge = len(tasks) < max_requests and (can_hedge is None or can_hedge())
+            done, _ = await asyncio.wait(tasks, timeout=delay if may_hedge else None, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                tasks.append(asyncio.ensure_future(operation()))
+                continue
+            for task in done:
+                tasks.remove(task)
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in tasks:
+            task.cancel()
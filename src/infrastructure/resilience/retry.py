@@ -0,0 +1,34 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Tuple, Type
+
+class DeadlineExceeded(Exception):
+    """O prazo total da chamada, somando tentativas e esperas, terminou"""
+
+async def retry_with_backoff(
+        operation: Callable[[], Awaitable[Any]],
+        attempts: int,
+        base_delay: float,
+        max_delay: float,
+        deadline: float,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,)) -> Any:
+    """Executa a operação com novas tentativas em backoff exponencial com jitter completo,
+    sem ultrapassar o prazo total. Erros com atributo `retry_after` esperam ao menos esse tempo."""
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline
+    for attempt in range(attempts):
+        remaining = deadline_at - loop.time()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        try:
+            return await asyncio.wait_for(operation(), timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+        except retry_on as error:
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            delay = max(delay, getattr(error, "retry_after", None) or 0)
+            if loop.time() + delay >= deadline_at:
+                raise
+            await asyncio.sleep(delay)
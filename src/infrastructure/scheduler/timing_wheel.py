@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class SearchTimingWheel:
+    """Roda de agendamento em memória com um slot por minuto do dia.
+
+    Cada container possui um único horário de vencimento, que pode estar a vários
+    dias de distância. As entradas ficam no slot do minuto em que vencem e são
+    retiradas conforme o cursor avança, sem percorrer o agendamento inteiro a cada
+    execução; entradas de dias futuros permanecem no slot até o seu dia.
+    """
+    SLOTS = 24 * 60
+
+    def __init__(self):
+        self._slots: List[List[Tuple[datetime, str]]] = [[] for _ in range(self.SLOTS)]
+        self._due: Dict[str, datetime] = {}
+        self._cursor: Optional[datetime] = None
+        self.version = None
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _slot_index(self, due: datetime) -> int:
+        return due.hour * 60 + due.minute
+
+    def load(self, schedules: Iterable[Tuple[str, time, Optional[datetime]]], now: datetime, version=None) -> None:
+        """Recarrega a roda a partir das próximas buscas calculadas ou, na falta delas, dos horários diários"""
+        self._slots = [[] for _ in range(self.SLOTS)]
+        self._due = {}
+        # Entradas anteriores ao cursor já foram despachadas hoje e vão para o dia seguinte
+        reference = self._cursor or now.replace(second=0, microsecond=0)
+        for container_number, search_time, next_search_at in schedules:
+            if next_search_at is not None:
+                # Busca atrasada (ex.: aplicação parada) vence imediatamente
+                due = max(next_search_at, reference)
+            else:
+                due = datetime.combine(reference.date(), search_time)
+                if due < reference:
+                    due += timedelta(days=1)
+            self.schedule(container_number, due)
+        self.version = version
+
+    def schedule(self, container_number: str, due: datetime) -> None:
+        """Agenda (ou reagenda) a próxima busca de um container"""
+        self._due[container_number] = due
+        self._slots[self._slot_index(due)].append((due, container_number))
+
+    def remove(self, container_number: str) -> bool:
+        # Remoção preguiçosa: a entrada antiga é descartada quando o slot for lido
+        return self._due.pop(container_number, None) is not None
+
+    def next_due(self, container_number: str) -> Optional[datetime]:
+        return self._due.get(container_number)
+
+    def pop_due(self, until: datetime) -> List[Tuple[datetime, str]]:
+        """Retira as entradas vencidas até `until`, reagendando-as para o dia seguinte.
+
+        O reagendamento de um dia é a garantia caso a busca falhe; após uma busca
+        bem-sucedida o agendador substitui a entrada pela próxima busca calculada.
+        """
+        until_minute = until.replace(second=0, microsecond=0)
+        start = self._cursor or until_minute
+        if until_minute - start >= timedelta(days=1):
+            start = until_minute - timedelta(days=1) + timedelta(minutes=1)
+
+        due_entries: List[Tuple[datetime, str]] = []
+        minute = start
+        while minute <= until_minute:
+            slot = self._slots[self._slot_index(minute)]
+            remaining = []
+            for due, container_number in slot:
+                if self._due.get(container_number) != due:
+                    continue
+                if due <= until:
+                    due_entries.append((due, container_number))
+                else:
+                    remaining.append((due, container_number))
+            slot[:] = remaining
+            minute += timedelta(minutes=1)
+
+        for due, container_number in due_entries:
+            self.schedule(container_number, due + timedelta(days=1))
+
+        self._cursor = until_minute + timedelta(minutes=1)
+        due_entries.sort()
+        return due_entries
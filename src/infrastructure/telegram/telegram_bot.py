@@ -1,17 +1,57 @@
+from telegram import Update
 from telegram.ext import ApplicationBuilder
 from src.services.telegram_bot_service import TelegramBotService
 import asyncio
+import os
+from typing import Optional
 from telegram.error import Conflict
 
+POLLING_MODE = "polling"
+# O webhook dispensa o long polling, mas os fluxos de várias mensagens (cadastro e
+# consulta) guardam o estado em context.user_data, na memória do processo: o modo
+# webhook continua exigindo uma única réplica atendendo a rota
+WEBHOOK_MODE = "webhook"
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", POLLING_MODE)
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")
+TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+# Permite apontar o bot para um servidor falso do Telegram (src/scripts/fake_telegram.py)
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL")
+
 
 class TelegramBot:
-    def __init__(self, token: str):
+    def __init__(
+            self,
+            token: str,
+            mode: str = TELEGRAM_MODE,
+            webhook_url: Optional[str] = TELEGRAM_WEBHOOK_URL,
+            webhook_secret: Optional[str] = TELEGRAM_WEBHOOK_SECRET,
+            base_url: Optional[str] = TELEGRAM_API_BASE_URL):
+        if mode not in (POLLING_MODE, WEBHOOK_MODE):
+            raise ValueError(f"TELEGRAM_MODE inválido: {mode}")
+        if mode == WEBHOOK_MODE and not (webhook_url and webhook_secret):
+            raise ValueError("O modo webhook exige TELEGRAM_WEBHOOK_URL e TELEGRAM_WEBHOOK_SECRET.")
+        if mode == WEBHOOK_MODE:
+            print("Modo webhook: o estado das conversas fica em memória, mantenha uma única réplica atendendo o webhook.")
+
         self.token = token
-        self.app = ApplicationBuilder().token(self.token).build()
+        self.mode = mode
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        builder = ApplicationBuilder().token(self.token)
+        if base_url:
+            builder = builder.base_url(base_url)
+        if mode == WEBHOOK_MODE:
+            # Sem Updater: as atualizações chegam pela rota do webhook
+            builder = builder.updater(None)
+        self.app = builder.build()
         self.handler = TelegramBotService()
         self.handler.setup_handlers(self.app)
         self._is_running = False
 
+    @property
+    def uses_webhook(self) -> bool:
+        return self.mode == WEBHOOK_MODE
+
     async def start_in_background(self):
         if self._is_running:
             print("O bot já está em execução!")
@@ -20,16 +60,24 @@ class TelegramBot:
         try:
             await self.app.initialize()
             await self.app.start()
-            
-            # Configuração recomendada para polling
-            await self.app.updater.start_polling(
-                drop_pending_updates=True,  # Ignora updates pendentes ao iniciar
-                timeout=10,  # Tempo de espera por updates
-                poll_interval=0.5  # Intervalo entre requisições
-            )
+
+            if self.uses_webhook:
+                # Uma única réplica: o estado das conversas não é compartilhado entre processos
+                await self.app.bot.set_webhook(
+                    url=self.webhook_url,
+                    secret_token=self.webhook_secret,
+                    allowed_updates=Update.ALL_TYPES
+                )
+            else:
+                # Configuração recomendada para polling
+                await self.app.updater.start_polling(
+                    drop_pending_updates=True,  # Ignora updates pendentes ao iniciar
+                    timeout=10,  # Tempo de espera por updates
+                    poll_interval=0.5  # Intervalo entre requisições
+                )
             
             self._is_running = True
-            print("Bot do Telegram iniciado com sucesso!")
+            print(f"Bot do Telegram iniciado com sucesso no modo {self.mode}!")
             
         except Conflict as e:
             print(f"Erro: Já existe uma instância do bot em execução. {e}")
@@ -45,7 +93,8 @@ class TelegramBot:
             return
             
         try:
-            await self.app.updater.stop()
+            if self.app.updater:
+                await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()
             self._is_running = False
@@ -54,6 +103,11 @@ class TelegramBot:
             print(f"Erro ao parar o bot: {e}")
             raise
 
+    async def process_webhook_update(self, data: dict) -> None:
+        """Entrega a atualização recebida pelo webhook à fila da aplicação"""
+        update = Update.de_json(data, self.app.bot)
+        await self.app.update_queue.put(update)
+
     async def _shutdown(self):
         """Método auxiliar para desligamento seguro"""
         try:
@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 from src.controllers.container_controller import router as container_router
+from src.controllers.carrier_controller import router as carrier_router
+from src.controllers.telegram_controller import router as telegram_router
 from src.infrastructure.telegram.telegram_bot import TelegramBot
 from contextlib import asynccontextmanager
 import os
@@ -7,25 +9,48 @@ from dotenv import load_dotenv
 from src.services.container_search_scheduling_service import get_container_search_scheduling_service
 import asyncio
 from fastapi.middleware.cors import CORSMiddleware
+from src.infrastructure.http.http_client import start_http_client, close_http_client
+from src.infrastructure.database.indexes import ensure_indexes
+from src.mappers.container_mapper import get_container_mapper
+from src.repositories.search_log_repository import SearchLogRepository
+from src.services.notification_dispatcher_service import create_notification_dispatcher_service
 
 load_dotenv()
 
 telegram_bot = TelegramBot(token=os.getenv("TELEGRAM_BOT_TOKEN"))
-container_search_scheduling_service = get_container_search_scheduling_service()
+notification_dispatcher = create_notification_dispatcher_service(telegram_bot.app.bot)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    start_http_client()
+    app.state.telegram_bot = telegram_bot
+
+    await SearchLogRepository(get_container_mapper()).ensure_collection()
+    await ensure_indexes()
+
     await telegram_bot.start_in_background()
     print("Bot Telegram rodando...")
     
+    # Criado por processo na inicialização, não na importação do módulo
+    container_search_scheduling_service = get_container_search_scheduling_service()
+    app.state.container_search_scheduling_service = container_search_scheduling_service
     container_search_scheduling_service.start_scheduler()
     print("Rotina de busca agendada iniciada...")
 
+    notification_dispatcher.start()
+
     yield
 
+    await container_search_scheduling_service.stop_scheduler()
+    print("Rotina de busca agendada finalizada.")
+
+    await notification_dispatcher.stop()
+
     await telegram_bot.app.stop()
     print("Bot Telegram finalizado.")
 
+    await close_http_client()
+
 app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +60,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.include_router(container_router, prefix="/api/v1")
+app.include_router(carrier_router, prefix="/api/v1")
+app.include_router(telegram_router, prefix="/api/v1")
 
 
 
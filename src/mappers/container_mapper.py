@@ -3,12 +3,22 @@ from src.models.container_view import ContainerView, EventView, SearchLogView
 from src.models.container_grid import ContainerGrid
 from src.domain.container import Container, Event, SearchLog, SearchStatus
 from src.models.container_dto import ContainerDTO, EventDTO
+from src.mappers.msc_response_parser import MscResponseParser
 from datetime import datetime
+from enum import Enum
+from typing import Iterator, List, Optional, Tuple
 from bson import ObjectId
 from src.enums.ShippingStatus import ShippingStatus
 from src.enums.Shipowners import Shipowners
 from src.enums.EventStatus import EventStatus
 
+EXPORT_CONTAINER_FIELDS = [
+    "id", "number", "shipowner", "shipping_status", "booking_number", "master_bill_of_lading_number",
+    "house_bill_of_lading_number", "shipped_from", "shipped_to", "port_of_load", "port_of_discharge",
+    "latest_effective_description", "last_successful_update", "last_failed_update"
+]
+EXPORT_EVENT_FIELDS = ["order", "estimated_date", "effective_date", "location", "un_location_code", "description", "detail", "status"]
+
 class ContainerMapper:
     # def complete_container_model_with_request_data(self, container: Container, create_model: ContainerCreate) -> Container:
     #     container.booking_number = create_model.booking_number
@@ -16,35 +26,16 @@ class ContainerMapper:
     #     container.shipowner = create_model.shipowner
     #     return container
 
+    def __init__(self):
+        self.response_parser = MscResponseParser()
+
     def from_api_response_to_dto_model(self, response_data):
-        try:
-            bl_data = response_data["Data"]["BillOfLadings"][0]  # Pegando o primeiro BL
-            container_data = bl_data["ContainersInfo"][0]  # Pegando o primeiro contêiner
-
-            return ContainerDTO(
-                number=container_data.get("ContainerNumber", ""),
-                master_bill_of_lading_number=bl_data.get("BillOfLadingNumber", ""),
-                shipped_from=bl_data.get("GeneralTrackingInfo", {}).get("ShippedFrom", ""),
-                shipped_to=bl_data.get("GeneralTrackingInfo", {}).get("ShippedTo", ""),
-                port_of_load=bl_data.get("GeneralTrackingInfo", {}).get("PortOfLoad", ""),
-                port_of_discharge=bl_data.get("GeneralTrackingInfo", {}).get("PortOfDischarge", ""),
-                events=[
-                    EventDTO(
-                        order=event.get("Order", 0),
-                        location=event.get("Location", ""),
-                        un_location_code=event.get("UnLocationCode", "") or "",
-                        description=event.get("Description", ""),
-                        detail = (event.get("Detail") or [None]) if (event.get("Detail") or [None])[0] is not None else None,
-                        estimated_date=event.get("Date", "") if datetime.strptime(event.get("Date", ""), "%d/%m/%Y") > datetime.now() or "Estimated" in event.get("Description", "") else None,
-                        effective_date=event.get("Date", "") if datetime.strptime(event.get("Date", ""), "%d/%m/%Y") <= datetime.now() and "Estimated" not in event.get("Description", "") else None
-                    ) for event in container_data.get("Events", [])
-                ]
-            )
-        except KeyError as e:
-            print(f"Erro ao processar a resposta da API: chave ausente {e}")
-            return None
+        return self.response_parser.parse(response_data)
+
+    def from_api_response_to_dto_models(self, response_data) -> List[ContainerDTO]:
+        return self.response_parser.parse_all(response_data)
     
-    def from_domain_to_view(self, container: Container) -> ContainerView:
+    def from_domain_to_view(self, container: Container, search_logs: Optional[List[SearchLog]] = None) -> ContainerView:
         events = [
             EventView(
                 order=event.order,
@@ -59,12 +50,12 @@ class ContainerMapper:
             for event in container.events
         ]
 
-        search_logs = [
+        search_log_views = [
             SearchLogView(
                 timestamp=log.timestamp,
                 status=log.status.value  # Convertendo Enum para string
             )
-            for log in container.search_logs
+            for log in search_logs or []
         ]
 
         return ContainerView(
@@ -78,9 +69,10 @@ class ContainerMapper:
             port_of_load=container.port_of_load,
             port_of_discharge=container.port_of_discharge,
             events=events,
-            search_logs=search_logs,
+            search_logs=search_log_views,
             shipping_status=container.shipping_status.value,
-            shipowner=container.shipowner.value
+            shipowner=container.shipowner.value,
+            version=container.version
         )
         
     def from_domain_to_dict(self, container: Container) -> dict:
@@ -95,32 +87,91 @@ class ContainerMapper:
             "port_of_discharge": container.port_of_discharge,
             "shipping_status": container.shipping_status.value,
             "shipowner": container.shipowner.value,
-            "events": [
-                {
-                    "order": event.order,
-                    "estimated_date": event.estimated_date,
-                    "effective_date": event.effective_date,
-                    "location": event.location,
-                    "un_location_code": event.un_location_code,
-                    "description": event.description,
-                    "detail": event.detail,
-                    "status": event.status.value
-                }
-                for event in container.events
-            ],
-            "search_logs": [
-                {
-                    "timestamp": log.timestamp.isoformat(),
-                    "status": log.status.value
-                }
-                for log in container.search_logs
-            ]
+            "events": [self.event_to_dict(event) for event in container.events],
+            "latest_effective_description": container.latest_effective_description,
+            "search_tokens": container.search_tokens,
+            "last_successful_update": container.last_successful_update,
+            "last_failed_update": container.last_failed_update,
+            "payload_fingerprint": container.payload_fingerprint,
+            "version": container.version
         }
 
         if container._id is not None:
             data["_id"] = ObjectId(container._id)
 
         return data
+
+    def event_to_dict(self, event: Event) -> dict:
+        return {
+            "order": event.order,
+            "estimated_date": event.estimated_date,
+            "effective_date": event.effective_date,
+            "location": event.location,
+            "un_location_code": event.un_location_code,
+            "description": event.description,
+            "detail": event.detail,
+            "status": event.status.value
+        }
+
+    def search_log_to_db(self, container_id: str, log: SearchLog) -> dict:
+        return {
+            "container_id": ObjectId(container_id),
+            "timestamp": log.timestamp,
+            "status": log.status.value
+        }
+
+    def from_db_to_search_log(self, doc: dict) -> SearchLog:
+        return SearchLog(
+            timestamp=doc["timestamp"],
+            status=SearchStatus(doc["status"])
+        )
+
+    def from_domain_changes_to_updates(self, container: Container) -> List[Tuple[dict, Optional[List[dict]]]]:
+        """Converte as alterações rastreadas em operações $pull/$set/$push, na ordem de aplicação"""
+        changes = container.changes
+        updates = []
+
+        # $pull e $push no mesmo array conflitam, então cada um vai numa operação própria
+        if changes.removed_events:
+            updates.append(({"$pull": {"events": {"order": {"$in": sorted(changes.removed_events)}}}}, None))
+
+        set_fields = {}
+        for field in changes.fields:
+            value = getattr(container, field)
+            set_fields[field] = value.value if isinstance(value, Enum) else value
+
+        array_filters = []
+        for index, order in enumerate(sorted(changes.updated_events)):
+            event = container.get_event(order)
+            if event is None:
+                continue
+            set_fields[f"events.$[e{index}]"] = self.event_to_dict(event)
+            array_filters.append({f"e{index}.order": order})
+
+        if changes.fields.intersection(Container.SEARCHABLE_FIELDS):
+            set_fields["search_tokens"] = container.search_tokens
+
+        if changes.added_events or changes.updated_events or changes.removed_events:
+            set_fields["latest_effective_description"] = container.latest_effective_description
+
+        if set_fields:
+            updates.append(({"$set": set_fields}, array_filters or None))
+
+        if changes.added_events:
+            updates.append(({
+                "$push": {
+                    "events": {
+                        "$each": [self.event_to_dict(event) for event in changes.added_events.values()],
+                        "$sort": {"order": 1}
+                    }
+                }
+            }, None))
+
+        # Cada escrita incrementa a revisão uma única vez, junto da primeira operação
+        if updates:
+            updates[0][0]["$inc"] = {"version": 1}
+
+        return updates
     
     def from_dict_to_domain(self, data: dict) -> Container:
         events = [
@@ -137,13 +188,16 @@ class ContainerMapper:
             for event in data.get("events", [])
         ]
 
-        search_logs = [
-            SearchLog(
-                timestamp=datetime.fromisoformat(log["timestamp"]),
-                status=SearchStatus(log["status"])  # Convertendo de string para Enum
-            )
-            for log in data.get("search_logs", [])
-        ]
+        last_successful_update = data.get("last_successful_update")
+        last_failed_update = data.get("last_failed_update")
+        # Documentos ainda não migrados guardam o histórico embutido
+        for log in data.get("search_logs", []):
+            timestamp = datetime.fromisoformat(log["timestamp"])
+            if log["status"] == SearchStatus.SUCCESS.value:
+                if "last_successful_update" not in data and (last_successful_update is None or timestamp > last_successful_update):
+                    last_successful_update = timestamp
+            elif "last_failed_update" not in data and (last_failed_update is None or timestamp > last_failed_update):
+                last_failed_update = timestamp
 
         return Container(
             _id=str(data.get("_id")) if data.get("_id") else None,
@@ -158,31 +212,38 @@ class ContainerMapper:
             shipping_status=ShippingStatus(data.get("shipping_status")),
             shipowner=Shipowners(data.get("shipowner")),
             events=events,
-            search_logs=search_logs
+            last_successful_update=last_successful_update,
+            last_failed_update=last_failed_update,
+            payload_fingerprint=data.get("payload_fingerprint"),
+            version=data.get("version", 0)
         )
     
-    def to_container_grid(self, container: dict) -> ContainerGrid:
+    def to_export_rows(self, container: dict, per_event: bool) -> Iterator[dict]:
+        """Achata o documento em linhas de exportação: uma por container ou uma por evento"""
+        row = {field: container.get(field) for field in EXPORT_CONTAINER_FIELDS}
+        row["id"] = str(container.get("_id"))
+        if not per_event:
+            yield row
+            return
 
-        # Obter a descrição do evento com maior ordem que possua effectiveDate definido
-        events = container.get("events", [])
-        events_with_date = [e for e in events if e.get("effective_date") is not None]
+        events = container.get("events") or []
+        if not events:
+            # Sem eventos o container ainda sai, com as colunas de evento vazias
+            yield row
+            return
 
-        if events_with_date:
-            latest_event = max(events_with_date, key=lambda e: e.get("order", 0))
-            description = latest_event.get("description", "")
-        else:
-            description = ""
+        for event in events:
+            event_row = dict(row)
+            for field in EXPORT_EVENT_FIELDS:
+                event_row[f"event_{field}"] = event.get(field)
+            yield event_row
 
-        # Obter o último search log com status Sucesso
-        search_logs = container.get("search_logs", [])
-        successful_logs = [
-            log for log in search_logs if log.get("status") == SearchStatus.SUCCESS.value
-        ]
-        if successful_logs:
-            latest_log = max(successful_logs, key=lambda log: log.get("timestamp"))
-            last_update = latest_log.get("timestamp")
-        else:
-            last_update = None
+    def to_container_grid(self, container: dict) -> ContainerGrid:
+        # Campos de resumo desnormalizados, mantidos a cada escrita do container
+        description = container.get("latest_effective_description") or ""
+
+        # Horário da última busca com status Sucesso, mantido no próprio documento
+        last_update = container.get("last_successful_update")
 
         # Criar e retornar o ContainerGrid
         return ContainerGrid(
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional
+from src.models.container_dto import ContainerDTO, EventDTO
+
+MSC_DATE_FORMAT = "%d/%m/%Y"
+
+@lru_cache(maxsize=4096)
+def parse_msc_date(value: str) -> datetime:
+    """Converte datas dd/mm/YYYY da MSC; as mesmas datas se repetem entre buscas"""
+    return datetime.strptime(value, MSC_DATE_FORMAT)
+
+def compute_fingerprint(container: ContainerDTO) -> str:
+    """Hash estável dos dados normalizados do container retornados pelo armador"""
+    normalized = [
+        container.number,
+        container.master_bill_of_lading_number,
+        container.shipped_from,
+        container.shipped_to,
+        container.port_of_load,
+        container.port_of_discharge,
+        sorted(
+            [e.order, e.location, e.un_location_code, e.description, e.detail, e.estimated_date, e.effective_date]
+            for e in container.events
+        )
+    ]
+    payload = json.dumps(normalized, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class MscResponseParser:
+    """Converte a resposta de rastreio da MSC em ContainerDTO numa única passada"""
+
+    def parse(self, response_data: dict, now: Optional[datetime] = None) -> Optional[ContainerDTO]:
+        try:
+            bl_data = response_data["Data"]["BillOfLadings"][0]  # Pegando o primeiro BL
+            container_data = bl_data["ContainersInfo"][0]  # Pegando o primeiro contêiner
+        except (KeyError, IndexError, TypeError) as e:
+            print(f"Erro ao processar a resposta da API: chave ausente {e}")
+            return None
+
+        return self.build_container(bl_data, container_data, now or datetime.now())
+
+    def parse_all(self, response_data: dict, now: Optional[datetime] = None) -> List[ContainerDTO]:
+        """Converte todos os containers de todos os BLs da resposta"""
+        try:
+            bills_of_lading = response_data["Data"]["BillOfLadings"]
+        except (KeyError, TypeError) as e:
+            print(f"Erro ao processar a resposta da API: chave ausente {e}")
+            return []
+
+        now = now or datetime.now()
+        return [
+            self.build_container(bl_data, container_data, now)
+            for bl_data in bills_of_lading
+            for container_data in bl_data.get("ContainersInfo", [])
+        ]
+
+    def build_container(self, bl_data: dict, container_data: dict, now: datetime) -> ContainerDTO:
+        general_info = bl_data.get("GeneralTrackingInfo", {})
+        container = ContainerDTO(
+            number=container_data.get("ContainerNumber", ""),
+            master_bill_of_lading_number=bl_data.get("BillOfLadingNumber", ""),
+            shipped_from=general_info.get("ShippedFrom", ""),
+            shipped_to=general_info.get("ShippedTo", ""),
+            port_of_load=general_info.get("PortOfLoad", ""),
+            port_of_discharge=general_info.get("PortOfDischarge", ""),
+            events=[self.build_event(event, now) for event in container_data.get("Events", [])]
+        )
+        container.fingerprint = compute_fingerprint(container)
+        return container
+
+    def build_event(self, event: dict, now: datetime) -> EventDTO:
+        description = event.get("Description", "")
+        date = event.get("Date", "")
+        detail = event.get("Detail")
+        # Data futura ou descrição "Estimated" indicam evento estimado; caso contrário, efetivo
+        is_estimated = parse_msc_date(date) > now or "Estimated" in description
+
+        return EventDTO(
+            order=event.get("Order", 0),
+            location=event.get("Location", ""),
+            un_location_code=event.get("UnLocationCode", "") or "",
+            description=description,
+            detail=detail if detail and detail[0] is not None else None,
+            estimated_date=date if is_estimated else None,
+            effective_date=None if is_estimated else date
+        )
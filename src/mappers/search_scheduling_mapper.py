@@ -7,10 +7,7 @@ class SearchSchedulingMapper:
     
     def from_db_to_domain(self, doc) -> SearchScheduling:
         container_data = [
-            ContainerSchedule(
-                container_number=entry["container_number"],
-                search_time=datetime.strptime(entry["search_time"], "%H:%M:%S").time()
-            )
+            self.from_db_to_container_schedule(entry)
             for entry in doc.get("containers", [])
         ]
         _id=str(doc.get("_id")) if doc.get("_id") else None
@@ -21,10 +18,7 @@ class SearchSchedulingMapper:
     
     def from_domain_to_db(self, scheduling: SearchScheduling) -> dict:
         container_data = [
-            {
-                "container_number": cs.container_number,
-                "search_time": cs.search_time.strftime("%H:%M:%S")
-            }
+            self.from_container_schedule_to_db(cs)
             for cs in scheduling.containers
         ]
         data = {
@@ -37,5 +31,22 @@ class SearchSchedulingMapper:
             data["_id"] = ObjectId(scheduling._id)
 
         return  data
+
+    def from_db_to_container_schedule(self, doc) -> ContainerSchedule:
+        return ContainerSchedule(
+            container_number=doc["container_number"],
+            search_time=datetime.strptime(doc["search_time"], "%H:%M:%S").time(),
+            next_search_at=doc.get("next_search_at")
+        )
+
+    def from_container_schedule_to_db(self, container_schedule: ContainerSchedule) -> dict:
+        data = {
+            "container_number": container_schedule.container_number,
+            "search_time": container_schedule.search_time.strftime("%H:%M:%S")
+        }
+        if container_schedule.next_search_at is not None:
+            data["next_search_at"] = container_schedule.next_search_at
+        return data
+
 def get_search_scheduling_mapper():
     return SearchSchedulingMapper()
\ No newline at end of file
@@ -2,6 +2,17 @@ from typing import List, Optional
 from src.enums.EventStatus import EventStatus
 
 class EventDTO:
+    __slots__ = (
+        "order",
+        "estimated_date",
+        "effective_date",
+        "location",
+        "un_location_code",
+        "description",
+        "detail",
+        "status",
+    )
+
     def __init__(
         self,
         order: int,
@@ -20,6 +31,27 @@ class EventDTO:
         self.description = description
         self.detail = detail
         self.status = None
+
+    def as_tuple(self) -> tuple:
+        """Valores comparáveis do evento, no mesmo formato de Event.as_tuple"""
+        return (
+            self.order,
+            self.estimated_date,
+            self.effective_date,
+            self.location,
+            self.un_location_code,
+            self.description,
+            self.detail,
+            self.status,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, EventDTO):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.order)
     
     def set_event_status(self):
         if self.effective_date is not None:
@@ -28,6 +60,20 @@ class EventDTO:
             self.status = EventStatus.ESTIMATED
     
 class ContainerDTO:
+    __slots__ = (
+        "_id",
+        "number",
+        "shipped_from",
+        "shipped_to",
+        "port_of_load",
+        "port_of_discharge",
+        "booking_number",
+        "master_bill_of_lading_number",
+        "house_bill_of_lading_number",
+        "events",
+        "fingerprint",
+    )
+
     def __init__(
         self,
         number: str,
@@ -39,6 +85,7 @@ class ContainerDTO:
         booking_number: Optional[str] = None,
         master_bill_of_lading_number: Optional[str] = None,
         house_bill_of_lading_number: Optional[str] = None,
+        fingerprint: Optional[str] = None,
         _id: Optional[str] = None
     ):
         self._id = _id or None
@@ -50,4 +97,23 @@ class ContainerDTO:
         self.booking_number = booking_number
         self.master_bill_of_lading_number = master_bill_of_lading_number
         self.house_bill_of_lading_number = house_bill_of_lading_number
-        self.events = events or []
\ No newline at end of file
+        self.events = events or []
+        self.fingerprint = fingerprint
+
+    def __eq__(self, other):
+        if not isinstance(other, ContainerDTO):
+            return NotImplemented
+        return (
+            self.number == other.number
+            and self.master_bill_of_lading_number == other.master_bill_of_lading_number
+            and self.shipped_from == other.shipped_from
+            and self.shipped_to == other.shipped_to
+            and self.port_of_load == other.port_of_load
+            and self.port_of_discharge == other.port_of_discharge
+            and self.booking_number == other.booking_number
+            and self.house_bill_of_lading_number == other.house_bill_of_lading_number
+            and self.events == other.events
+        )
+
+    def __hash__(self):
+        return hash(self.number)
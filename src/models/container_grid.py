@@ -11,5 +11,5 @@ class ContainerGrid(BaseModel):
     master_bill_of_lading_number: str
     booking_number: str
     description: str
-    last_update: datetime
+    last_update: Optional[datetime] = None
     shipping_status: str
@@ -36,10 +36,10 @@ class ContainerView(BaseModel):
     search_logs: List[SearchLogView] = []
     shipping_status: Optional[str] = None
     shipowner: Optional[str] = None
+    version: int = 0
 
-    def to_telegram_chat(self) -> str:
-        # Formatação das informações do contêiner
-        container_info = (
+    def _telegram_header(self) -> str:
+        return (
             f"📦 **Número do Contêiner**: {self.number}\n"
             f"🚢 **Armador**: {self.shipowner}\n"
             f"🔢 **Número de Reserva**: {self.booking_number}\n"
@@ -49,19 +49,68 @@ class ContainerView(BaseModel):
             f"⚓ **Porto de Embarque**: {self.port_of_load}\n"
             f"⚓ **Porto de Desembarque**: {self.port_of_discharge}\n"
             f"🕐 **Status da Viagem**: {self.shipping_status}\n"
-            f"📝 **Eventos**:\n\n"
         )
 
-        # Adiciona os eventos formatados
-        event_info = "\n".join([event.to_telegram_chat() for event in self.events])
-        
-         # Logs de busca formatados (opcional)
+    def to_telegram_chat(self) -> str:
+        # Formatação das informações do contêiner com todos os eventos e logs
+        parts = [self._telegram_header(), "📝 **Eventos**:\n\n"]
+        parts.append("\n".join(event.to_telegram_chat() for event in self.events))
+
+        # Logs de busca formatados (opcional)
         if self.search_logs:
-            logs_info = "\n📊 **Histórico de Buscas**:\n"
-            for log in self.search_logs:
-                logs_info += f"🕒 {log.timestamp.strftime('%d/%m/%Y %H:%M:%S')} - {log.status.value}\n"
+            parts.append("\n📊 **Histórico de Buscas**:\n")
+            parts.extend(f"{_format_search_log(log)}\n" for log in self.search_logs)
         else:
-            logs_info = "\n📊 **Histórico de Buscas**: Nenhum registro\n"
+            parts.append("\n📊 **Histórico de Buscas**: Nenhum registro\n")
+
+        return "".join(parts)
+
+    def to_telegram_summary(self) -> str:
+        """Resumo compacto: dados do container, último evento e totais"""
+        parts = [self._telegram_header()]
+        if self.events:
+            parts.append(f"\n📝 **Último Evento**:\n{self.events[-1].to_telegram_chat()}")
+        parts.append(f"\n📝 **Eventos**: {len(self.events)} | 📊 **Buscas recentes**: {len(self.search_logs)}")
+        return _fit_telegram_message("".join(parts))
+
+    def to_telegram_event_pages(self, per_page: int) -> List[str]:
+        return _paginate(
+            [event.to_telegram_chat() for event in self.events],
+            per_page,
+            "📝 **Eventos**",
+            "📝 **Eventos**: Nenhum registro"
+        )
 
-        # Junta as informações do contêiner com os eventos
-        return container_info + event_info + logs_info
\ No newline at end of file
+    def to_telegram_search_log_pages(self, per_page: int) -> List[str]:
+        # Mais recentes primeiro
+        return _paginate(
+            [_format_search_log(log) for log in reversed(self.search_logs)],
+            per_page,
+            "📊 **Histórico de Buscas**",
+            "📊 **Histórico de Buscas**: Nenhum registro"
+        )
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+def _format_search_log(log: SearchLogView) -> str:
+    return f"🕒 {log.timestamp.strftime('%d/%m/%Y %H:%M:%S')} - {log.status.value}"
+
+def _fit_telegram_message(text: str) -> str:
+    if len(text) <= TELEGRAM_MESSAGE_LIMIT:
+        return text
+    # Corta na última quebra de linha para não deixar uma marcação Markdown aberta
+    cut = text.rfind("\n", 0, TELEGRAM_MESSAGE_LIMIT - 1)
+    if cut <= 0:
+        cut = TELEGRAM_MESSAGE_LIMIT - 1
+    return text[:cut] + "…"
+
+def _paginate(lines: List[str], per_page: int, title: str, empty_message: str) -> List[str]:
+    if not lines:
+        return [empty_message]
+    total_pages = (len(lines) + per_page - 1) // per_page
+    return [
+        _fit_telegram_message(
+            f"{title} ({page + 1}/{total_pages}):\n\n" + "\n".join(lines[page * per_page:(page + 1) * per_page])
+        )
+        for page in range(total_pages)
+    ]
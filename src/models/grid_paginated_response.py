@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from src.models.container_grid import ContainerGrid
 
 class GridPaginatedResponse(BaseModel):
@@ -7,3 +7,4 @@ class GridPaginatedResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
@@ -1,22 +1,71 @@
-from typing import Optional, List
+import os
+import re
+from typing import AsyncIterator, Dict, Optional, List
 from src.infrastructure.database.connection import db
-from src.domain.container import Container
 from src.mappers.container_mapper import ContainerMapper, get_container_mapper
+from src.repositories.search_log_repository import SearchLogRepository, get_search_log_repository
+from src.domain.container import Container, SearchLog
+from src.domain.search_tokens import build_query_tokens, normalize_identifier
 from src.enums.Shipowners import Shipowners
 from src.enums.ShippingStatus import ShippingStatus
 from fastapi import Depends
 from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from src.infrastructure.cache.ttl_cache import TTLCache
+
+GRID_COUNT_CACHE_TTL_SECONDS = float(os.getenv("GRID_COUNT_CACHE_TTL_SECONDS", "30"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# Totais do grid por filtro de busca, compartilhados entre as requisições
+_grid_count_cache = TTLCache(GRID_COUNT_CACHE_TTL_SECONDS, max_size=256)
 
 class ContainerRepository:
-    def __init__(self, container_mapper: ContainerMapper):
+    def __init__(self, container_mapper: ContainerMapper, search_log_repository: SearchLogRepository):
         self.collection = db["containers"]
         self.container_mapper = container_mapper
+        self.search_log_repository = search_log_repository
 
     async def save(self, container: Container) -> None:
+        container.version = 1
         container_dict = self.container_mapper.from_domain_to_dict(container)
-        await self.collection.insert_one(container_dict)
+        result = await self.collection.insert_one(container_dict)
+        container._id = str(result.inserted_id)
+        await self.search_log_repository.add_many(container._id, container.changes.search_logs)
+        container.clear_changes()
+        _grid_count_cache.clear()
         print("Container salvo com sucesso!")
 
+    async def save_many(self, containers: List[Container]) -> Dict[int, str]:
+        """Insere vários containers com um único insert_many.
+
+        Retorna os erros por posição na lista; os demais containers são gravados
+        mesmo quando parte do lote falha.
+        """
+        if not containers:
+            return {}
+        for container in containers:
+            container.version = 1
+        documents = [self.container_mapper.from_domain_to_dict(container) for container in containers]
+        errors: Dict[int, str] = {}
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors = {error["index"]: error.get("errmsg", "Erro ao gravar o container.") for error in e.details.get("writeErrors", [])}
+
+        search_logs = []
+        for position, (container, document) in enumerate(zip(containers, documents)):
+            if position in errors:
+                continue
+            # O driver preenche o _id dos documentos antes de enviá-los
+            container._id = str(document["_id"])
+            search_logs.extend((container._id, log) for log in container.changes.search_logs)
+            container.clear_changes()
+        await self.search_log_repository.add_batch(search_logs)
+        _grid_count_cache.clear()
+        print(f"{len(containers) - len(errors)} de {len(containers)} containers salvos com sucesso!")
+        return errors
+
     async def get_by_number(self, container_number: str) -> Optional[dict]:
         container = await self.collection.find_one({
             "number": container_number,
@@ -30,15 +79,61 @@ class ContainerRepository:
         if container._id is None:
             raise ValueError("O container precisa ter um _id para ser atualizado.")
         
-        container_dict = self.container_mapper.from_domain_to_dict(container)
+        # Envia apenas os campos, eventos e logs alterados, em vez do documento inteiro
+        updates = self.container_mapper.from_domain_changes_to_updates(container)
+        search_logs = container.changes.search_logs
+        if not updates and not search_logs:
+            return False
 
-        result = await self.collection.replace_one(
-            {"_id": ObjectId(container._id)},
-            container_dict
-        )
+        modified = False
+        if updates:
+            operations = [
+                UpdateOne({"_id": ObjectId(container._id)}, update, array_filters=array_filters)
+                for update, array_filters in updates
+            ]
+            result = await self.collection.bulk_write(operations, ordered=True)
+            modified = result.modified_count > 0
+            container.version += 1
+        await self.search_log_repository.add_many(container._id, search_logs)
+        container.clear_changes()
 
-        return result.modified_count > 0
+        return modified
     
+    async def update_many(self, containers: List[Container]) -> int:
+        """Grava as alterações de vários containers num único bulk_write"""
+        operations = []
+        search_logs = []
+        written = []
+        for container in containers:
+            if container._id is None:
+                raise ValueError("O container precisa ter um _id para ser atualizado.")
+            updates = self.container_mapper.from_domain_changes_to_updates(container)
+            if updates:
+                written.append(container)
+            operations.extend(
+                UpdateOne({"_id": ObjectId(container._id)}, update, array_filters=array_filters)
+                for update, array_filters in updates
+            )
+            search_logs.extend((container._id, log) for log in container.changes.search_logs)
+
+        modified = 0
+        if operations:
+            result = await self.collection.bulk_write(operations, ordered=True)
+            modified = result.modified_count
+        await self.search_log_repository.add_batch(search_logs)
+        for container in written:
+            container.version += 1
+        for container in containers:
+            container.clear_changes()
+        return modified
+
+    async def get_processing_by_master_bill_of_lading(self, master_bill_of_lading_number: str) -> List[Container]:
+        cursor = self.collection.find({
+            "master_bill_of_lading_number": master_bill_of_lading_number,
+            "shipping_status": ShippingStatus.PROCESSING.value
+        })
+        return [self.container_mapper.from_dict_to_domain(document) async for document in cursor]
+
     async def get_all_by_number(self, container_number: str) -> List[Container]:
         cursor = self.collection.find({"number": container_number})
         containers = []
@@ -47,33 +142,77 @@ class ContainerRepository:
             containers.append(container)
         return containers
 
+    async def get_all_by_numbers(self, container_numbers: List[str]) -> List[Container]:
+        cursor = self.collection.find({"number": {"$in": container_numbers}})
+        return [self.container_mapper.from_dict_to_domain(document) async for document in cursor]
+
+    def _grid_query(self, search: Optional[str]) -> dict:
+        query = {}
+        tokens = build_query_tokens(search)
+        if not tokens and search and search.strip():
+            # Busca só de separadores (ex.: "-"): não casa com nenhum container
+            return {"_id": {"$in": []}}
+        if tokens:
+            # O índice de tokens seleciona os candidatos; a regex confirma a substring contígua
+            query["search_tokens"] = {"$all": tokens}
+            if len(tokens) > 1:
+                # Ignora separadores no documento, como na normalização dos tokens
+                pattern = "[^0-9A-Za-z]*".join(re.escape(char) for char in normalize_identifier(search))
+                query["$or"] = [
+                    {field: {"$regex": pattern, "$options": "i"}}
+                    for field in Container.SEARCHABLE_FIELDS
+                ]
+        return query
+
     async def find_all_for_grid(
         self,
         search: Optional[str],
         page: int,
-        page_size: int
+        page_size: int,
+        after_id: Optional[str] = None
     ) -> List[dict]:
-        query = {}
-
-        if search:
-            query["number"] = {"$regex": search, "$options": "i"}
-
         projection = {
             "_id": 1,
             "number": 1,
             "master_bill_of_lading_number": 1,
             "booking_number": 1,
-            "events": 1,
-            "search_logs": 1,
+            "latest_effective_description": 1,
+            "last_successful_update": 1,
             "shipowner": 1,
-            "shipping_status": 1
+            "shipping_status": 1,
+            "version": 1
         }
+        return await self._grid_page(search, page, page_size, after_id, projection)
+
+    async def _grid_page(
+        self,
+        search: Optional[str],
+        page: int,
+        page_size: int,
+        after_id: Optional[str],
+        projection: dict
+    ) -> List[dict]:
+        query = self._grid_query(search)
 
-        skip = (page - 1) * page_size
+        if after_id:
+            # Paginação por chave: continua a partir do último _id da página anterior
+            query["_id"] = {"$gt": ObjectId(after_id)}
+
+        cursor = self.collection.find(query, projection).sort("_id", ASCENDING)
+        if not after_id:
+            cursor = cursor.skip((page - 1) * page_size)
+
+        return await cursor.limit(page_size).to_list(length=page_size)
+
+    async def iter_for_export(self, search: Optional[str], include_events: bool, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[dict]:
+        """Percorre os containers do filtro do grid direto do cursor, um lote por vez no servidor"""
+        projection = {"search_tokens": 0, "search_logs": 0}
+        if not include_events:
+            projection["events"] = 0
+        cursor = self.collection.find(self._grid_query(search), projection).sort("_id", ASCENDING).batch_size(batch_size)
+        async for document in cursor:
+            yield document
 
-        cursor = self.collection.find(query, projection).skip(skip).limit(page_size)
-        return await cursor.to_list(length=page_size)
-    
     async def get_by_id(self, id: str) -> Optional[dict]:
         container = await self.collection.find_one({
             "_id": ObjectId(id),
@@ -82,16 +221,51 @@ class ContainerRepository:
             return None
         return self.container_mapper.from_dict_to_domain(container)
     
+    async def get_version(self, id: str) -> Optional[int]:
+        """Lê apenas a revisão do container, sem carregar o documento"""
+        document = await self.collection.find_one({"_id": ObjectId(id)}, {"version": 1})
+        if document is None:
+            return None
+        return document.get("version", 0)
+
+    async def find_grid_versions(
+        self,
+        search: Optional[str],
+        page: int,
+        page_size: int,
+        after_id: Optional[str] = None
+    ) -> List[dict]:
+        """Mesma página do grid, projetando só _id e revisão para calcular o ETag"""
+        return await self._grid_page(search, page, page_size, after_id, {"_id": 1, "version": 1})
+
     async def count_all_for_grid(self, search: Optional[str]) -> int:
-        query = {}
-        if search:
-            query["number"] = {"$regex": search, "$options": "i"}
-        return await self.collection.count_documents(query)
+        query = self._grid_query(search)
+        # Chave pela consulta efetiva: "-" normaliza para "" mas não casa com nada
+        cache_key = repr(query)
+        total = _grid_count_cache.get(cache_key)
+        if total is None:
+            total = await self.collection.count_documents(query)
+            _grid_count_cache.set(cache_key, total)
+        return total
     
     async def delete_by_id(self, id: str) -> bool:
         result = await self.collection.delete_one({"_id": ObjectId(id)})
+        if result.deleted_count == 1:
+            _grid_count_cache.clear()
+            await self.search_log_repository.delete_by_container(id)
         return result.deleted_count == 1
 
+    async def find_search_logs(self, container_id: str, limit: int = 50) -> List[SearchLog]:
+        return await self.search_log_repository.find_by_container(container_id, limit)
+
+    async def get_revision_by_number(self, container_number: str, processing_only: bool = False) -> Optional[dict]:
+        """Mesmo container de get_by_number_to_telegram (ou de get_by_number, com
+        processing_only), projetando só _id e revisão"""
+        query = {"number": container_number}
+        if processing_only:
+            query["shipping_status"] = ShippingStatus.PROCESSING.value
+        return await self.collection.find_one(query, {"_id": 1, "version": 1})
+
     async def get_by_number_to_telegram(self, container_number: str) -> Optional[dict]:
         container = await self.collection.find_one({
             "number": container_number,
@@ -101,6 +275,7 @@ class ContainerRepository:
         return self.container_mapper.from_dict_to_domain(container)
     
 def get_container_repository(
-        container_mapper: ContainerMapper = Depends(get_container_mapper)
+        container_mapper: ContainerMapper = Depends(get_container_mapper),
+        search_log_repository: SearchLogRepository = Depends(get_search_log_repository)
 ):
-    return ContainerRepository(container_mapper)
+    return ContainerRepository(container_mapper, search_log_repository)
@@ -0,0 +1,195 @@
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from src.infrastructure.database.connection import db
+from src.domain.search_scheduling import (
+    SearchScheduling,
+    ContainerSchedule,
+    DEFAULT_START_SEARCH_TIME,
+    DEFAULT_END_SEARCH_TIME
+)
+from src.mappers.search_scheduling_mapper import SearchSchedulingMapper
+
+class ContainerScheduleRepository:
+    """Armazena um documento de agendamento por container, indexado por search_time"""
+    META_ID = "container_schedules"
+
+    def __init__(self, search_scheduling_mapper: SearchSchedulingMapper):
+        self.collection = db["container_schedules"]
+        self.meta_collection = db["search_scheduling_meta"]
+        self.mapper = search_scheduling_mapper
+
+    async def _bump_version(self) -> int:
+        doc = await self.meta_collection.find_one_and_update(
+            {"_id": self.META_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+    async def save(self, scheduling: SearchScheduling) -> None:
+        operations = [
+            UpdateOne(
+                {"container_number": cs.container_number},
+                {"$set": self.mapper.from_container_schedule_to_db(cs)},
+                upsert=True
+            )
+            for cs in scheduling.containers
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+        await self._bump_version()
+
+    async def get(self) -> Optional[SearchScheduling]:
+        containers = [
+            self.mapper.from_db_to_container_schedule(doc)
+            async for doc in self.collection.find({}, {"_id": 0, "container_number": 1, "search_time": 1, "next_search_at": 1})
+        ]
+        if not containers:
+            return None
+
+        return SearchScheduling(
+            start_search_time=DEFAULT_START_SEARCH_TIME,
+            end_search_time=DEFAULT_END_SEARCH_TIME,
+            containers=containers
+        )
+
+    async def get_version(self) -> Optional[int]:
+        doc = await self.meta_collection.find_one({"_id": self.META_ID})
+        if not doc:
+            return None
+        return doc.get("version", 0)
+
+    async def add_container(self, container_schedule: ContainerSchedule) -> int:
+        await self.collection.update_one(
+            {"container_number": container_schedule.container_number},
+            {"$set": self.mapper.from_container_schedule_to_db(container_schedule)},
+            upsert=True
+        )
+        return await self._bump_version()
+
+    async def add_containers(self, container_schedules: List[ContainerSchedule]) -> int:
+        operations = [
+            UpdateOne(
+                {"container_number": cs.container_number},
+                {"$set": self.mapper.from_container_schedule_to_db(cs)},
+                upsert=True
+            )
+            for cs in container_schedules
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+        return await self._bump_version()
+
+    async def set_next_search_times(self, next_search_times: Dict[str, datetime], unleased_only: bool = False) -> None:
+        """Grava as próximas buscas; com unleased_only, não altera agendamentos reservados
+        por outra instância, que gravará a própria decisão ao liberar a reserva"""
+        now = datetime.now()
+        operations = []
+        for container_number, next_search_at in next_search_times.items():
+            query = {"container_number": container_number}
+            if unleased_only:
+                query["$or"] = [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]
+            operations.append(UpdateOne(query, {"$set": {"next_search_at": next_search_at}}))
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def get_search_times(self, container_numbers: List[str]) -> Dict[str, time]:
+        """Horário diário dos containers informados, sem carregar o agendamento inteiro"""
+        cursor = self.collection.find(
+            {"container_number": {"$in": container_numbers}},
+            {"_id": 0, "container_number": 1, "search_time": 1}
+        )
+        schedules = [self.mapper.from_db_to_container_schedule(doc) async for doc in cursor]
+        return {cs.container_number: cs.search_time for cs in schedules}
+
+    async def remove_container(self, container_number: str) -> Optional[int]:
+        result = await self.collection.delete_one({"container_number": container_number})
+        if not result.deleted_count:
+            return None
+        return await self._bump_version()
+
+    async def fill_missing_next_search_times(self, now: datetime) -> int:
+        """Define a primeira busca dos agendamentos novos pelo horário diário, para que possam ser reservados"""
+        operations = []
+        async for doc in self.collection.find({"next_search_at": None}, {"_id": 0, "container_number": 1, "search_time": 1}):
+            schedule = self.mapper.from_db_to_container_schedule(doc)
+            due = datetime.combine(now.date(), schedule.search_time)
+            if due < now:
+                due += timedelta(days=1)
+            operations.append(UpdateOne(
+                {"container_number": schedule.container_number, "next_search_at": None},
+                {"$set": {"next_search_at": due}}
+            ))
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def claim_due(self, owner: str, now: datetime, lease_seconds: float, limit: int) -> List[ContainerSchedule]:
+        """Reserva atomicamente até `limit` agendamentos vencidos, livres ou com reserva expirada"""
+        claimed = []
+        for _ in range(limit):
+            doc = await self.collection.find_one_and_update(
+                {
+                    "next_search_at": {"$lte": now},
+                    "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": now}}]
+                },
+                {"$set": {"lease_owner": owner, "lease_expires_at": now + timedelta(seconds=lease_seconds)}},
+                projection={"_id": 0, "container_number": 1, "search_time": 1, "next_search_at": 1},
+                sort=[("next_search_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is None:
+                break
+            claimed.append(self.mapper.from_db_to_container_schedule(doc))
+        return claimed
+
+    async def heartbeat(self, owner: str, container_numbers: List[str], lease_seconds: float) -> int:
+        """Renova as reservas ainda em andamento desta instância"""
+        result = await self.collection.update_many(
+            {"container_number": {"$in": container_numbers}, "lease_owner": owner},
+            {"$set": {"lease_expires_at": datetime.now() + timedelta(seconds=lease_seconds)}}
+        )
+        return result.modified_count
+
+    async def release(self, owner: str, container_number: str, next_search_at: datetime) -> bool:
+        """Libera a reserva gravando a próxima busca; não faz nada se a reserva foi perdida"""
+        result = await self.collection.update_one(
+            {"container_number": container_number, "lease_owner": owner},
+            {
+                "$set": {"next_search_at": next_search_at},
+                "$unset": {"lease_owner": "", "lease_expires_at": ""}
+            }
+        )
+        return result.modified_count > 0
+
+    async def find_due(self, start: time, end: time) -> List[ContainerSchedule]:
+        """Busca por intervalo no índice de search_time (formato HH:MM:SS ordena lexicograficamente)"""
+        cursor = self.collection.find(
+            {"search_time": {"$gte": start.strftime("%H:%M:%S"), "$lte": end.strftime("%H:%M:%S")}},
+            {"_id": 0, "container_number": 1, "search_time": 1}
+        ).sort("search_time", ASCENDING)
+        return [self.mapper.from_db_to_container_schedule(doc) async for doc in cursor]
+
+    async def migrate_from_single_document(self, single_document_collection) -> int:
+        """Copia os agendamentos do documento único para um documento por container"""
+        doc = await single_document_collection.find_one()
+        if not doc:
+            return 0
+
+        scheduling = self.mapper.from_db_to_domain(doc)
+        operations = [
+            UpdateOne(
+                {"container_number": cs.container_number},
+                {"$setOnInsert": self.mapper.from_container_schedule_to_db(cs)},
+                upsert=True
+            )
+            for cs in scheduling.containers
+        ]
+        if not operations:
+            return 0
+
+        result = await self.collection.bulk_write(operations, ordered=False)
+        await self._bump_version()
+        return result.upserted_count
@@ -0,0 +1,102 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List
+from src.infrastructure.database.connection import db
+from bson import ObjectId
+from pymongo import ASCENDING
+
+PENDING = "pending"
+# Reservada por um despachante; next_attempt_at guarda o fim da reserva
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+class NotificationOutboxRepository:
+    """Fila persistente das notificações de alteração, consumida pelo despachante"""
+
+    def __init__(self):
+        self.collection = db["notification_outbox"]
+
+    async def add_many(self, notifications: List[dict]) -> None:
+        if not notifications:
+            return
+        now = datetime.now()
+        for notification in notifications:
+            notification.update(status=PENDING, attempts=0, created_at=now, next_attempt_at=now)
+        await self.collection.insert_many(notifications, ordered=False)
+
+    @staticmethod
+    def _claimable(now: datetime) -> dict:
+        # Pendentes vencidas ou reservadas por um despachante cuja reserva expirou
+        return {"status": {"$in": [PENDING, SENDING]}, "next_attempt_at": {"$lte": now}}
+
+    async def find_pending_chats(self, limit: int, exclude: Iterable[int] = ()) -> List[int]:
+        """Chats com notificações a enviar, da pendência mais antiga para a mais nova"""
+        match = self._claimable(datetime.now())
+        exclude = list(exclude)
+        if exclude:
+            match["chat_id"] = {"$nin": exclude}
+        cursor = self.collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$chat_id", "oldest": {"$min": "$next_attempt_at"}}},
+            {"$sort": {"oldest": ASCENDING}},
+            {"$limit": limit}
+        ])
+        return [doc["_id"] async for doc in cursor]
+
+    async def claim_chat(self, chat_id: int, lease_seconds: float, limit: int) -> List[dict]:
+        """Reserva atomicamente até `limit` notificações do chat, para que outra réplica não as envie"""
+        now = datetime.now()
+        candidates = self.collection.find(
+            {"chat_id": chat_id, **self._claimable(now)}, {"_id": 1}
+        ).sort([("next_attempt_at", ASCENDING), ("created_at", ASCENDING)]).limit(limit)
+        ids = [doc["_id"] async for doc in candidates]
+        if not ids:
+            return []
+
+        # O filtro repete a condição: só a réplica que mudar o documento fica com ele
+        claim_id = uuid.uuid4().hex
+        await self.collection.update_many(
+            {"_id": {"$in": ids}, **self._claimable(now)},
+            {"$set": {"status": SENDING, "claim_id": claim_id, "next_attempt_at": now + timedelta(seconds=lease_seconds)}}
+        )
+        cursor = self.collection.find({"_id": {"$in": ids}, "claim_id": claim_id}).sort("created_at", ASCENDING)
+        return await cursor.to_list(length=limit)
+
+    async def release(self, ids: List[ObjectId]) -> None:
+        """Devolve à fila, sem contar tentativa, notificações reservadas que não foram enviadas"""
+        if ids:
+            await self.collection.update_many(
+                {"_id": {"$in": ids}, "status": SENDING},
+                {"$set": {"status": PENDING, "next_attempt_at": datetime.now()}, "$unset": {"claim_id": ""}}
+            )
+
+    async def mark_sent(self, ids: List[ObjectId]) -> None:
+        if ids:
+            await self.collection.update_many(
+                {"_id": {"$in": ids}},
+                {"$set": {"status": SENT, "sent_at": datetime.now()}, "$unset": {"claim_id": ""}}
+            )
+
+    async def mark_failed(self, ids: List[ObjectId], error: str, retry_in: timedelta, max_attempts: int) -> None:
+        """Registra a falha e reagenda; após max_attempts a notificação é descartada"""
+        if not ids:
+            return
+        await self.collection.update_many(
+            {"_id": {"$in": ids}},
+            [{"$set": {
+                "attempts": {"$add": ["$attempts", 1]},
+                "last_error": error,
+                "next_attempt_at": datetime.now() + retry_in,
+                "status": {"$cond": [{"$gte": [{"$add": ["$attempts", 1]}, max_attempts]}, FAILED, PENDING]}
+            }}, {"$unset": "claim_id"}]
+        )
+
+    async def discard_chat(self, chat_id: int, error: str) -> None:
+        await self.collection.update_many(
+            {"chat_id": chat_id, "status": {"$in": [PENDING, SENDING]}},
+            {"$set": {"status": FAILED, "last_error": error}, "$unset": {"claim_id": ""}}
+        )
+
+def get_notification_outbox_repository() -> NotificationOutboxRepository:
+    return NotificationOutboxRepository()
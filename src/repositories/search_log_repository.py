@@ -0,0 +1,72 @@
+from collections import Counter
+from typing import List, Tuple
+from src.infrastructure.database.connection import db
+from src.domain.container import SearchLog
+from src.enums.SearchStatus import SearchStatus
+from src.mappers.container_mapper import ContainerMapper, get_container_mapper
+from fastapi import Depends
+from bson import ObjectId
+from pymongo import DESCENDING, UpdateOne
+
+class SearchLogRepository:
+    """Logs de busca em coleção time-series, com contadores diários por container"""
+    COLLECTION_NAME = "search_logs"
+
+    def __init__(self, container_mapper: ContainerMapper):
+        self.collection = db[self.COLLECTION_NAME]
+        self.rollup_collection = db["search_log_rollups"]
+        self.container_mapper = container_mapper
+
+    async def ensure_collection(self) -> None:
+        existing = await db.list_collection_names(filter={"name": self.COLLECTION_NAME})
+        if not existing:
+            await db.create_collection(
+                self.COLLECTION_NAME,
+                timeseries={"timeField": "timestamp", "metaField": "container_id", "granularity": "hours"}
+            )
+
+    async def add_many(self, container_id: str, logs: List[SearchLog]) -> None:
+        await self.add_batch([(container_id, log) for log in logs])
+
+    async def add_batch(self, entries: List[Tuple[str, SearchLog]]) -> None:
+        """Grava logs de vários containers com um insert e um bulk de contadores"""
+        if not entries:
+            return
+
+        await self.collection.insert_many(
+            [self.container_mapper.search_log_to_db(container_id, log) for container_id, log in entries],
+            ordered=False
+        )
+
+        counters = Counter(
+            (container_id, log.timestamp.strftime("%Y-%m-%d"), "success" if log.status is SearchStatus.SUCCESS else "failure")
+            for container_id, log in entries
+        )
+        operations = [
+            UpdateOne(
+                {"container_id": ObjectId(container_id), "day": day},
+                {"$inc": {field: count}},
+                upsert=True
+            )
+            for (container_id, day, field), count in counters.items()
+        ]
+        await self.rollup_collection.bulk_write(operations, ordered=False)
+
+    async def find_by_container(self, container_id: str, limit: int = 50) -> List[SearchLog]:
+        """Retorna os logs mais recentes do container em ordem cronológica"""
+        cursor = self.collection.find(
+            {"container_id": ObjectId(container_id)},
+            {"_id": 0, "timestamp": 1, "status": 1}
+        ).sort("timestamp", DESCENDING).limit(limit)
+        logs = [self.container_mapper.from_db_to_search_log(doc) async for doc in cursor]
+        logs.reverse()
+        return logs
+
+    async def delete_by_container(self, container_id: str) -> None:
+        await self.collection.delete_many({"container_id": ObjectId(container_id)})
+        await self.rollup_collection.delete_many({"container_id": ObjectId(container_id)})
+
+def get_search_log_repository(
+    container_mapper: ContainerMapper = Depends(get_container_mapper)
+) -> SearchLogRepository:
+    return SearchLogRepository(container_mapper)
@@ -1,8 +1,17 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
 from src.infrastructure.database.connection import db
-from src.domain.search_scheduling import SearchScheduling
+from src.domain.search_scheduling import SearchScheduling, ContainerSchedule
 from src.mappers.search_scheduling_mapper import SearchSchedulingMapper, get_search_scheduling_mapper
 from fastapi import Depends
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from src.repositories.container_schedule_repository import ContainerScheduleRepository
+
+SINGLE_DOCUMENT_STORAGE = "single_document"
+PER_CONTAINER_STORAGE = "per_container"
+SEARCH_SCHEDULING_STORAGE = os.getenv("SEARCH_SCHEDULING_STORAGE", SINGLE_DOCUMENT_STORAGE)
 
 class SearchSchedulingRepository:
     def __init__(self, search_scheduling_mapper: SearchSchedulingMapper):
@@ -11,9 +20,10 @@ class SearchSchedulingRepository:
 
     async def save(self, scheduling: SearchScheduling) -> None:
         doc = self.mapper.from_domain_to_db(scheduling)
+        doc.pop("_id", None)
         await self.collection.update_one(
             filter={},
-            update={"$set": doc},
+            update={"$set": doc, "$inc": {"version": 1}},
             upsert=True
         )
     
@@ -24,15 +34,80 @@ class SearchSchedulingRepository:
             return None
 
         return self.mapper.from_db_to_domain(doc)
+
+    async def get_version(self) -> Optional[int]:
+        """Retorna apenas a versão do agendamento, que muda a cada escrita"""
+        doc = await self.collection.find_one({}, {"version": 1})
+        if not doc:
+            return None
+        return doc.get("version", 0)
     
     async def update(self, scheduling: SearchScheduling) -> None:     
         scheduling_dict = self.mapper.from_domain_to_db(scheduling)
-        await self.collection.replace_one(
+        scheduling_dict.pop("_id", None)
+        await self.collection.update_one(
             {"_id": ObjectId(scheduling._id)},
-            scheduling_dict
+            {"$set": scheduling_dict, "$inc": {"version": 1}}
+        )
+
+    async def add_container(self, container_schedule: ContainerSchedule) -> Optional[int]:
+        """Adiciona um agendamento e retorna a nova versão"""
+        doc = await self.collection.find_one_and_update(
+            {},
+            {
+                "$push": {"containers": self.mapper.from_container_schedule_to_db(container_schedule)},
+                "$inc": {"version": 1}
+            },
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
         )
+        return doc.get("version") if doc else None
+
+    async def add_containers(self, container_schedules: List[ContainerSchedule]) -> Optional[int]:
+        """Adiciona vários agendamentos numa única escrita e retorna a nova versão"""
+        doc = await self.collection.find_one_and_update(
+            {},
+            {
+                "$push": {"containers": {"$each": [self.mapper.from_container_schedule_to_db(cs) for cs in container_schedules]}},
+                "$inc": {"version": 1}
+            },
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return doc.get("version") if doc else None
+
+    async def set_next_search_times(self, next_search_times: Dict[str, datetime]) -> None:
+        """Grava as próximas buscas sem mudar a versão: a roda do agendador já foi ajustada"""
+        operations = [
+            UpdateOne(
+                {"containers.container_number": container_number},
+                {"$set": {"containers.$.next_search_at": next_search_at}}
+            )
+            for container_number, next_search_at in next_search_times.items()
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def remove_container(self, container_number: str) -> Optional[int]:
+        """Remove um agendamento e retorna a nova versão, ou None se não existia"""
+        doc = await self.collection.find_one_and_update(
+            {"containers.container_number": container_number},
+            {
+                "$pull": {"containers": {"container_number": container_number}},
+                "$inc": {"version": 1}
+            },
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return doc.get("version") if doc else None
+
+def create_search_scheduling_repository(search_scheduling_mapper: SearchSchedulingMapper):
+    """Escolhe o modo de armazenamento do agendamento conforme SEARCH_SCHEDULING_STORAGE"""
+    if SEARCH_SCHEDULING_STORAGE == PER_CONTAINER_STORAGE:
+        return ContainerScheduleRepository(search_scheduling_mapper)
+    return SearchSchedulingRepository(search_scheduling_mapper)
 
 def get_search_scheduling_repository(
     search_scheduling_mapper: SearchSchedulingMapper = Depends(get_search_scheduling_mapper)
 ) -> SearchSchedulingRepository:
-    return SearchSchedulingRepository(search_scheduling_mapper)
\ No newline at end of file
+    return create_search_scheduling_repository(search_scheduling_mapper)
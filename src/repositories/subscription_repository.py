@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Dict, List
+from src.infrastructure.database.connection import db
+from bson import ObjectId
+from pymongo import ASCENDING
+
+class SubscriptionRepository:
+    """Inscrições de chats do Telegram para receber as alterações de um container"""
+
+    def __init__(self):
+        self.collection = db["subscriptions"]
+
+    async def subscribe(self, chat_id: int, container_id: str, container_number: str) -> bool:
+        """Retorna False se o chat já acompanhava o container"""
+        result = await self.collection.update_one(
+            {"chat_id": chat_id, "container_id": ObjectId(container_id)},
+            {"$setOnInsert": {"container_number": container_number, "created_at": datetime.now()}},
+            upsert=True
+        )
+        return result.upserted_id is not None
+
+    async def unsubscribe(self, chat_id: int, container_number: str) -> bool:
+        result = await self.collection.delete_many({"chat_id": chat_id, "container_number": container_number})
+        return result.deleted_count > 0
+
+    async def unsubscribe_chat(self, chat_id: int) -> int:
+        result = await self.collection.delete_many({"chat_id": chat_id})
+        return result.deleted_count
+
+    async def find_by_chat(self, chat_id: int) -> List[str]:
+        cursor = self.collection.find({"chat_id": chat_id}, {"_id": 0, "container_number": 1}).sort("container_number", ASCENDING)
+        return [doc["container_number"] async for doc in cursor]
+
+    async def find_chats_by_containers(self, container_ids: List[str]) -> Dict[str, List[int]]:
+        """Chats inscritos por container, numa única consulta"""
+        chats: Dict[str, List[int]] = {}
+        cursor = self.collection.find(
+            {"container_id": {"$in": [ObjectId(container_id) for container_id in container_ids]}},
+            {"_id": 0, "chat_id": 1, "container_id": 1}
+        )
+        async for doc in cursor:
+            chats.setdefault(str(doc["container_id"]), []).append(doc["chat_id"])
+        return chats
+
+def get_subscription_repository() -> SubscriptionRepository:
+    return SubscriptionRepository()
@@ -0,0 +1,48 @@
+"""Preenche os campos de resumo e os tokens de busca do grid em containers antigos.
+
+Uso: python -m src.scripts.backfill_grid_summary
+"""
+import asyncio
+from pymongo import UpdateOne
+from src.infrastructure.database.connection import db
+from src.mappers.container_mapper import get_container_mapper
+
+BATCH_SIZE = 500
+
+async def main():
+    container_mapper = get_container_mapper()
+    containers = db["containers"]
+    query = {
+        "$or": [
+            {"latest_effective_description": {"$exists": False}},
+            {"last_successful_update": {"$exists": False}},
+            {"search_tokens": {"$exists": False}}
+        ]
+    }
+
+    updated = 0
+    operations = []
+    async for doc in containers.find(query).batch_size(BATCH_SIZE):
+        container = container_mapper.from_dict_to_domain(doc)
+        operations.append(UpdateOne(
+            {"_id": doc["_id"]},
+            {"$set": {
+                "latest_effective_description": container.latest_effective_description,
+                "search_tokens": container.search_tokens,
+                "last_successful_update": container.last_successful_update,
+                "last_failed_update": container.last_failed_update
+            }, "$inc": {"version": 1}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            result = await containers.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+
+    if operations:
+        result = await containers.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    print(f"Resumo do grid preenchido em {updated} containers.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""Servidor falso da Bot API do Telegram para testar o modo webhook localmente.
+
+Responde aos métodos usados pelo bot (getMe, setWebhook, sendMessage, ...), registra as
+mensagens enviadas e entrega atualizações simuladas ao webhook configurado.
+
+Uso:
+    uvicorn src.scripts.fake_telegram:app --port 8081
+    # na API: TELEGRAM_MODE=webhook TELEGRAM_API_BASE_URL=http://localhost:8081/bot
+    #         TELEGRAM_WEBHOOK_URL=http://localhost:8000/api/v1/telegram/webhook TELEGRAM_WEBHOOK_SECRET=...
+    curl -X POST "http://localhost:8081/simulate/message?chat_id=1&text=/start"
+    curl http://localhost:8081/sent
+"""
+import itertools
+import json
+import time
+from typing import Optional
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+
+app = FastAPI(title="Telegram falso")
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "TrackWise", "username": "trackwise_fake_bot"}
+
+_webhook = {"url": None, "secret_token": None}
+_sent_messages = []
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+async def _read_params(request: Request) -> dict:
+    # A biblioteca do bot envia formulário com valores compostos em JSON
+    if request.headers.get("content-type", "").startswith("application/json"):
+        return await request.json()
+    params = {}
+    for key, value in (await request.form()).items():
+        try:
+            params[key] = json.loads(value)
+        except (TypeError, ValueError):
+            params[key] = value
+    return params
+
+def _message(chat_id, text: str, message_id: Optional[int] = None, from_user: Optional[dict] = None) -> dict:
+    message = {
+        "message_id": message_id or next(_message_ids),
+        "date": int(time.time()),
+        "chat": {"id": int(chat_id), "type": "private"},
+        "text": text
+    }
+    if from_user:
+        message["from"] = from_user
+    if text.startswith("/"):
+        command = text.split()[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return message
+
+@app.post("/bot{token}/{method}")
+async def bot_api(token: str, method: str, request: Request):
+    params = await _read_params(request)
+    if method == "getMe":
+        result = BOT_USER
+    elif method == "setWebhook":
+        _webhook.update(url=params.get("url"), secret_token=params.get("secret_token"))
+        result = True
+    elif method == "deleteWebhook":
+        _webhook.update(url=None, secret_token=None)
+        result = True
+    elif method in ("sendMessage", "editMessageText"):
+        result = _message(params["chat_id"], params.get("text", ""), params.get("message_id"), BOT_USER)
+        _sent_messages.append({"method": method, **params})
+        print(f"[Telegram falso] {method} para {params.get('chat_id')}: {params.get('text', '')[:80]}")
+    elif method == "answerCallbackQuery":
+        result = True
+    else:
+        return {"ok": False, "error_code": 404, "description": f"Método {method} não simulado"}
+    return {"ok": True, "result": result}
+
+async def _deliver(update: dict) -> dict:
+    if not _webhook["url"]:
+        raise HTTPException(status_code=409, detail="Nenhum webhook registrado.")
+    headers = {}
+    if _webhook["secret_token"]:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = _webhook["secret_token"]
+    async with httpx.AsyncClient() as client:
+        response = await client.post(_webhook["url"], json=update, headers=headers)
+    return {"update_id": update["update_id"], "webhook_status": response.status_code}
+
+@app.post("/simulate/message")
+async def simulate_message(chat_id: int, text: str):
+    user = {"id": chat_id, "is_bot": False, "first_name": "Teste"}
+    return await _deliver({"update_id": next(_update_ids), "message": _message(chat_id, text, from_user=user)})
+
+@app.post("/simulate/callback")
+async def simulate_callback(chat_id: int, data: str, message_id: int = 1):
+    user = {"id": chat_id, "is_bot": False, "first_name": "Teste"}
+    return await _deliver({
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": user,
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": _message(chat_id, "", message_id, BOT_USER)
+        }
+    })
+
+@app.get("/sent")
+async def sent_messages():
+    return {"webhook": _webhook, "messages": _sent_messages}
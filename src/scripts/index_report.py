@@ -0,0 +1,31 @@
+"""Relata índices declarados ausentes e índices existentes sem uso ($indexStats).
+
+Uso: python -m src.scripts.index_report
+"""
+import asyncio
+from src.infrastructure.database.connection import db
+from src.infrastructure.database.indexes import REQUIRED_INDEXES
+
+async def main():
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        declared = {index.document["name"] for index in indexes}
+        existing = set((await collection.index_information()).keys())
+        stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+
+        print(f"\n[{collection_name}]")
+        missing = sorted(declared - existing)
+        print(f"  Ausentes: {', '.join(missing) if missing else '-'}")
+
+        undeclared = sorted(existing - declared - {"_id_"})
+        print(f"  Não declarados: {', '.join(undeclared) if undeclared else '-'}")
+
+        unused = sorted(
+            f"{stat['name']} (desde {stat['accesses']['since']:%d/%m/%Y %H:%M})"
+            for stat in stats
+            if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+        )
+        print(f"  Sem uso: {', '.join(unused) if unused else '-'}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
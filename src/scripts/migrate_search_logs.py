@@ -0,0 +1,67 @@
+"""Move os search_logs embutidos nos containers para a coleção time-series.
+
+Uso: python -m src.scripts.migrate_search_logs
+
+Pode rodar com a aplicação nova já no ar e ser reexecutado após uma interrupção:
+logs já presentes na coleção não são inseridos de novo e os horários de última
+busca só avançam.
+"""
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from src.infrastructure.database.connection import db
+from src.domain.container import SearchLog
+from src.enums.SearchStatus import SearchStatus
+from src.mappers.container_mapper import get_container_mapper
+from src.repositories.search_log_repository import SearchLogRepository
+
+def _to_millis(timestamp: datetime) -> datetime:
+    # O Mongo guarda datas com precisão de milissegundos
+    return timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+
+async def _missing_logs(container_id: str, logs: list) -> list:
+    """Logs ainda não gravados na coleção time-series por uma execução anterior"""
+    if not logs:
+        return []
+    existing = set()
+    cursor = db[SearchLogRepository.COLLECTION_NAME].find(
+        {
+            "container_id": ObjectId(container_id),
+            "timestamp": {"$gte": min(log.timestamp for log in logs), "$lte": max(log.timestamp for log in logs)}
+        },
+        {"_id": 0, "timestamp": 1, "status": 1}
+    )
+    async for log in cursor:
+        existing.add((_to_millis(log["timestamp"]), log["status"]))
+    return [log for log in logs if (_to_millis(log.timestamp), log.status.value) not in existing]
+
+async def main():
+    search_log_repository = SearchLogRepository(get_container_mapper())
+    await search_log_repository.ensure_collection()
+    containers = db["containers"]
+
+    migrated = 0
+    cursor = containers.find({"search_logs": {"$exists": True}}, {"search_logs": 1}).batch_size(200)
+    async for doc in cursor:
+        logs = [
+            SearchLog(timestamp=datetime.fromisoformat(log["timestamp"]), status=SearchStatus(log["status"]))
+            for log in doc.get("search_logs", [])
+        ]
+        container_id = str(doc["_id"])
+        await search_log_repository.add_many(container_id, await _missing_logs(container_id, logs))
+
+        successful = [log.timestamp for log in logs if log.status is SearchStatus.SUCCESS]
+        failed = [log.timestamp for log in logs if log.status is SearchStatus.FAILURE]
+        update = {"$unset": {"search_logs": ""}, "$inc": {"version": 1}}
+        # $max preserva horários mais novos já gravados pela aplicação
+        latest = {"last_successful_update": max(successful, default=None), "last_failed_update": max(failed, default=None)}
+        latest = {field: value for field, value in latest.items() if value is not None}
+        if latest:
+            update["$max"] = latest
+        await containers.update_one({"_id": doc["_id"]}, update)
+        migrated += 1
+
+    print(f"Logs de busca migrados de {migrated} containers.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,19 @@
+"""Migra o agendamento do documento único para um documento por container.
+
+Uso: python -m src.scripts.migrate_search_scheduling
+Depois de migrar, defina SEARCH_SCHEDULING_STORAGE=per_container.
+"""
+import asyncio
+from src.infrastructure.database.connection import db
+from src.infrastructure.database.indexes import ensure_indexes
+from src.mappers.search_scheduling_mapper import get_search_scheduling_mapper
+from src.repositories.container_schedule_repository import ContainerScheduleRepository
+
+async def main():
+    await ensure_indexes()
+    repository = ContainerScheduleRepository(get_search_scheduling_mapper())
+    migrated = await repository.migrate_from_single_document(db["search_scheduling"])
+    print(f"{migrated} agendamentos migrados para a coleção container_schedules.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
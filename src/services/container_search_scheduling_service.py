@@ -1,15 +1,39 @@
 import asyncio
+import os
+import socket
+import uuid
 from datetime import datetime, timedelta, time as dt_time
-from src.repositories.search_scheduling_repository import SearchSchedulingRepository
+from typing import Dict, List, Optional, Set
+from src.repositories.search_scheduling_repository import SearchSchedulingRepository, create_search_scheduling_repository
+from src.repositories.container_schedule_repository import ContainerScheduleRepository
 from src.services.msc_service import MscService, get_msc_service 
 from src.services.container_service import ContainerService
 from src.repositories.container_repository import ContainerRepository
+from src.repositories.search_log_repository import SearchLogRepository
 from src.mappers.container_mapper import ContainerMapper
 from src.mappers.search_scheduling_mapper import SearchSchedulingMapper
 from src.enums.SearchStatus import SearchStatus
 from src.services.search_scheduling_service import SearchSchedulingService
+from src.services.notification_service import create_notification_service
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from src.enums.ShippingStatus import ShippingStatus
+from src.domain.search_scheduling import ContainerSchedule
+from src.infrastructure.scheduler.timing_wheel import SearchTimingWheel
+from src.domain.polling_policy import next_search_at
+
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+FAILED_SEARCH_RETRY_MINUTES = int(os.getenv("FAILED_SEARCH_RETRY_MINUTES", "60"))
+
+# local: roda de agendamento em memória, para uma única instância
+# leased: instâncias reservam os agendamentos vencidos no Mongo (exige SEARCH_SCHEDULING_STORAGE=per_container)
+# disabled: a instância não executa buscas agendadas
+LOCAL_SCHEDULER_MODE = "local"
+LEASED_SCHEDULER_MODE = "leased"
+DISABLED_SCHEDULER_MODE = "disabled"
+SEARCH_SCHEDULER_MODE = os.getenv("SEARCH_SCHEDULER_MODE", LOCAL_SCHEDULER_MODE)
+SEARCH_LEASE_SECONDS = float(os.getenv("SEARCH_LEASE_SECONDS", "300"))
+SEARCH_LEASE_POLL_SECONDS = float(os.getenv("SEARCH_LEASE_POLL_SECONDS", "15"))
 
 class ContainerSearchSchedulerService:
     def __init__(
@@ -19,23 +43,91 @@ class ContainerSearchSchedulerService:
             msc_service = MscService, 
             container_repository = ContainerRepository,
             container_mapper = ContainerMapper,
-            search_scheduling_service = SearchSchedulingService):
+            search_scheduling_service = SearchSchedulingService,
+            workers: int = SEARCH_WORKERS,
+            max_concurrency: int = SEARCH_MAX_CONCURRENCY,
+            mode: str = SEARCH_SCHEDULER_MODE):
+        if mode not in (LOCAL_SCHEDULER_MODE, LEASED_SCHEDULER_MODE, DISABLED_SCHEDULER_MODE):
+            raise ValueError(f"SEARCH_SCHEDULER_MODE inválido: {mode}")
+        if mode == LEASED_SCHEDULER_MODE and not isinstance(scheduling_repository, ContainerScheduleRepository):
+            raise ValueError("O modo leased exige SEARCH_SCHEDULING_STORAGE=per_container.")
         self.scheduling_repository = scheduling_repository
         self.container_service = container_service
         self.msc_service = msc_service
         self.container_repository = container_repository
         self.container_mapper = container_mapper
         self.search_scheduling_service=search_scheduling_service
+        self.workers = max(1, workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timing_wheel = SearchTimingWheel()
+        # Horário diário de cada container, âncora dos intervalos de um dia ou mais
+        self._search_times: Dict[str, dt_time] = {}
+        self._scheduler: Optional[AsyncIOScheduler] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self.mode = mode
+        # Identifica as reservas desta instância no modo leased
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._leased: Set[str] = set()
+        # Próxima busca decidida para cada container reservado, gravada ao liberar a reserva
+        self._planned: Dict[str, datetime] = {}
+        # Próximas buscas ainda não gravadas: da roda local, para que uma recarga a reproduza,
+        # ou de containers sem reserva desta instância
+        self._unsaved_next_searches: Dict[str, datetime] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Containers atualizados pela busca de outro container do mesmo BL, ainda não visitados
+        self._updated_by_bill_of_lading: Set[str] = set()
 
     def start_scheduler(self):
-        scheduler = AsyncIOScheduler()
-        scheduler.add_job(
-            self.execute_search_routine_wrapper,
-            'interval', 
-            minutes=1
-        )
-        scheduler.start()
-        print("[Scheduler] Agendador iniciado com rotina a cada hora cheia.")
+        if self.mode == DISABLED_SCHEDULER_MODE:
+            print("[Scheduler] Buscas agendadas desativadas nesta instância.")
+            return
+
+        self._queue = asyncio.PriorityQueue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._worker_tasks = [
+            asyncio.create_task(self._search_worker(index))
+            for index in range(self.workers)
+        ]
+
+        self._scheduler = AsyncIOScheduler()
+        if self.mode == LEASED_SCHEDULER_MODE:
+            self._scheduler.add_job(
+                self.execute_leased_routine,
+                'interval',
+                seconds=SEARCH_LEASE_POLL_SECONDS,
+                max_instances=1,
+                coalesce=True
+            )
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        else:
+            self._scheduler.add_job(
+                self.execute_search_routine_wrapper,
+                'cron', 
+                second=0,
+                max_instances=1,
+                coalesce=True
+            )
+        self._scheduler.start()
+        print(f"[Scheduler] Agendador iniciado no modo {self.mode} ({self.instance_id}), {self.workers} workers e limite de {self.max_concurrency} buscas simultâneas.")
+
+    async def stop_scheduler(self):
+        if self._scheduler:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+
+        tasks = self._worker_tasks + ([self._heartbeat_task] if self._heartbeat_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._heartbeat_task = None
+
+        # Reservas ainda na fila voltam imediatamente para as outras instâncias
+        for container_number in list(self._leased):
+            self._planned.setdefault(container_number, datetime.now())
+            await self._release_lease(container_number)
     
     async def execute_search_routine_wrapper(self):
         now = datetime.now().replace(second=0, microsecond=0)
@@ -44,40 +136,216 @@ class ContainerSearchSchedulerService:
 
         print(f"[{datetime.now()}] Executando wrapper da rotina entre {start.time()} e {end.time()}")
         await self.execute_search_routine(start, end)
+
+    async def refresh_timing_wheel(self, now: datetime):
+        """Recarrega a roda de agendamento apenas quando o agendamento mudou"""
+        version = await self.scheduling_repository.get_version()
+        if version is not None and version == self.timing_wheel.version:
+            return
+
+        scheduling = await self.scheduling_repository.get()
+        schedules = scheduling.containers if scheduling else []
+        self._search_times = {cs.container_number: cs.search_time for cs in schedules}
+        self.timing_wheel.load(
+            ((cs.container_number, cs.search_time, cs.next_search_at) for cs in schedules),
+            now,
+            version
+        )
+        print(f"[{datetime.now()}] Roda de agendamento recarregada com {len(self.timing_wheel)} containers (versão {version})")
     
     async def execute_search_routine(self, start: datetime, end: datetime):
         try:
             print(f"\n[{datetime.now()}] Buscando containers agendados entre {start.time()} e {end.time()}")
 
-            scheduling = await self.scheduling_repository.get()
-            if not scheduling or not scheduling.containers:
-                print("Nenhum agendamento encontrado para esta hora.")
+            await self.refresh_timing_wheel(start)
+            due_entries = self.timing_wheel.pop_due(end)
+            if not due_entries:
+                print("Nenhum agendamento encontrado para este minuto.")
                 return
 
-            containers_to_search = [
-                cs for cs in scheduling.containers
-                if start.time() <= cs.search_time <= end.time()
-            ]
-            containers_to_search.sort(key=lambda c: c.search_time)
+            # Grava o reagendamento de garantia do dia seguinte feito pela roda
+            for _, container_number in due_entries:
+                self._unsaved_next_searches[container_number] = self.timing_wheel.next_due(container_number)
 
-            for container in containers_to_search:
-                scheduled_time = datetime.combine(datetime.today(), container.search_time)
-                now = datetime.now()
-                wait_time = (scheduled_time - now).total_seconds()
+            if not self.msc_service.is_available():
+                self.postpone_until_available([container_number for _, container_number in due_entries])
+                await self.save_next_searches()
+                return
+            await self.save_next_searches()
 
-                if wait_time > 0:
-                    print(f"Aguardando {int(wait_time)}s para buscar container {container.container_number}")
-                    await asyncio.sleep(wait_time)
-                await self.search_single_container(container)
+            # A rotina apenas enfileira; as buscas rodam nos workers sem atrasar o próximo minuto
+            for due_at, container_number in due_entries:
+                self._queue.put_nowait((due_at, container_number))
 
         except Exception as e:
             print(f"[{datetime.now()}] Erro inesperado ao executar rotina de busca: {e}")
 
+    async def execute_leased_routine(self):
+        """Reserva no Mongo os agendamentos vencidos que cabem nos workers desta instância"""
+        try:
+            if not self.msc_service.is_available():
+                return
+            capacity = self.workers * 2 - len(self._leased)
+            if capacity <= 0:
+                return
+
+            now = datetime.now()
+            await self.scheduling_repository.fill_missing_next_search_times(now)
+            claimed = await self.scheduling_repository.claim_due(self.instance_id, now, SEARCH_LEASE_SECONDS, capacity)
+            for container_schedule in claimed:
+                self._leased.add(container_schedule.container_number)
+                self._search_times[container_schedule.container_number] = container_schedule.search_time
+                self._queue.put_nowait((container_schedule.next_search_at or now, container_schedule.container_number))
+            if claimed:
+                print(f"[{datetime.now()}] {len(claimed)} agendamentos reservados por {self.instance_id}")
+        except Exception as e:
+            print(f"[{datetime.now()}] Erro inesperado ao reservar agendamentos: {e}")
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(SEARCH_LEASE_SECONDS / 3)
+            if not self._leased:
+                continue
+            try:
+                await self.scheduling_repository.heartbeat(self.instance_id, list(self._leased), SEARCH_LEASE_SECONDS)
+            except Exception as e:
+                print(f"[{datetime.now()}] Erro ao renovar reservas: {e}")
+
+    async def _release_lease(self, container_number: str):
+        search_time = self._search_times.get(container_number, datetime.now().time())
+        # Sem decisão (ex.: erro inesperado), volta no horário diário do dia seguinte
+        next_search = self._planned.pop(container_number, None) or datetime.combine(
+            datetime.now().date() + timedelta(days=1), search_time
+        )
+        self._leased.discard(container_number)
+        try:
+            await self.scheduling_repository.release(self.instance_id, container_number, next_search)
+        except Exception as e:
+            print(f"[{datetime.now()}] Erro ao liberar a reserva de {container_number}: {e}")
+
+    def schedule_next(self, container_number: str, next_search: datetime) -> None:
+        """Registra a próxima busca: na roda local ou para gravar ao liberar a reserva"""
+        if self.mode == LEASED_SCHEDULER_MODE and container_number in self._leased:
+            self._planned[container_number] = next_search
+            return
+        if self.mode != LEASED_SCHEDULER_MODE:
+            self.timing_wheel.schedule(container_number, next_search)
+        # Sem reserva (ex.: outro container do mesmo BL), a próxima busca é gravada direto
+        self._unsaved_next_searches[container_number] = next_search
+
+    async def save_next_searches(self) -> None:
+        """Grava, sem mudar a versão, as próximas buscas registradas fora das reservas"""
+        if not self._unsaved_next_searches:
+            return
+        next_search_times, self._unsaved_next_searches = self._unsaved_next_searches, {}
+        try:
+            if self.mode == LEASED_SCHEDULER_MODE:
+                # Sem reserva desta instância: não sobrescreve quem estiver com a reserva
+                await self.scheduling_repository.set_next_search_times(next_search_times, unleased_only=True)
+            else:
+                await self.scheduling_repository.set_next_search_times(next_search_times)
+        except Exception as e:
+            print(f"[{datetime.now()}] Erro ao gravar as próximas buscas: {e}")
+
+    async def _search_worker(self, index: int):
+        while True:
+            due_at, container_number = await self._queue.get()
+            try:
+                wait_time = (due_at - datetime.now()).total_seconds()
+                if wait_time > 0:
+                    await asyncio.sleep(wait_time)
+                search_time = self._search_times.get(container_number, due_at.time())
+                async with self._semaphore:
+                    if not self.msc_service.is_available():
+                        self.postpone_until_available([container_number])
+                        continue
+                    await self.search_single_container(ContainerSchedule(container_number, search_time))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[{datetime.now()}] Erro no worker {index} ao buscar {container_number}: {e}")
+            finally:
+                if self.mode == LEASED_SCHEDULER_MODE:
+                    await self._release_lease(container_number)
+                else:
+                    await self.save_next_searches()
+                self._queue.task_done()
+
+    def postpone_until_available(self, container_numbers: List[str]) -> None:
+        """Com o disjuntor aberto, adia as buscas para depois da reabertura, espalhadas
+        ao longo de um minuto para não voltar ao armador de uma vez"""
+        resume_at = datetime.now() + timedelta(seconds=self.msc_service.seconds_until_available())
+        for index, container_number in enumerate(container_numbers):
+            self.schedule_next(container_number, resume_at + timedelta(seconds=index % 60))
+        print(f"[{datetime.now()}] Armador indisponível, {len(container_numbers)} buscas adiadas para {resume_at}")
+
+    def planned_search_at(self, container, reference: datetime) -> Optional[datetime]:
+        search_time = self._search_times.get(container.number, reference.time())
+        return next_search_at(container, reference, search_time)
+
+    def fresh_until(self, container) -> Optional[datetime]:
+        """Se a última atualização ainda não venceu pela política de frequência, retorna quando ela vence"""
+        if container.last_successful_update is None:
+            return None
+        planned = self.planned_search_at(container, container.last_successful_update)
+        if planned is None or planned <= datetime.now():
+            return None
+        return planned
+
+    async def reschedule(self, containers) -> None:
+        """Ajusta a roda com a próxima busca de cada container e grava sem mudar a versão"""
+        now = datetime.now()
+        if self.mode == LEASED_SCHEDULER_MODE:
+            # Containers do mesmo BL não reservados aqui: usa o horário diário do agendamento deles
+            unknown = [container.number for container in containers if container.number not in self._search_times]
+            if unknown:
+                try:
+                    self._search_times.update(await self.scheduling_repository.get_search_times(unknown))
+                except Exception as e:
+                    print(f"[{datetime.now()}] Erro ao carregar os horários diários: {e}")
+        for container in containers:
+            planned = self.planned_search_at(container, now)
+            if planned is not None:
+                self.schedule_next(container.number, planned)
+        await self.save_next_searches()
+
     async def search_single_container(self, container):
+        actual_container = None
         try:
+            actual_container = await self.container_repository.get_by_number(container.container_number)
+            if actual_container is None:
+                print(f"[{datetime.now().time()}] Container {container.container_number} agendado não está em acompanhamento")
+                return
+
+            # Só pula quem já foi atualizado pela busca do BL de outro container
+            fresh_until = None
+            if actual_container.number in self._updated_by_bill_of_lading:
+                self._updated_by_bill_of_lading.discard(actual_container.number)
+                fresh_until = self.fresh_until(actual_container)
+            if fresh_until is not None:
+                self.schedule_next(actual_container.number, fresh_until)
+                print(f"[{datetime.now().time()}] {container.container_number} já atualizado recentemente, próxima busca em {fresh_until}")
+                return
+
+            master_bl = actual_container.master_bill_of_lading_number
+            if master_bl and await self.search_bill_of_lading(master_bl, actual_container.number):
+                return
+
             print(f"[{datetime.now().time()}] Executando busca para {container.container_number}")
             msc_response = await self.msc_service.get_tracking_info(container.container_number)
-            actual_container = await self.container_repository.get_by_number(container.container_number)
+
+            if msc_response is None:
+                if not self.msc_service.is_available():
+                    # Disjuntor abriu durante a busca: não conta como falha do container
+                    self.postpone_until_available([container.container_number])
+                    return
+                actual_container.add_search_log(SearchStatus.FAILURE)
+                await self.container_repository.update(actual_container)
+                self.schedule_next(
+                    container.container_number, datetime.now() + timedelta(minutes=FAILED_SEARCH_RETRY_MINUTES)
+                )
+                print(f"[{datetime.now().time()}] Armador não respondeu para {container.container_number}, nova tentativa em {FAILED_SEARCH_RETRY_MINUTES} minutos")
+                return
 
             if msc_response.get("IsSuccess") is False:
                 actual_container.add_search_log(SearchStatus.FAILURE)
@@ -90,26 +358,66 @@ class ContainerSearchSchedulerService:
             updated_container = await self.container_service.compare_and_update_container(actual_container, new_container_data)
             if(updated_container.shipping_status.value == ShippingStatus.FINISHED.value):
                 await self.search_scheduling_service.remove_container_schedule(updated_container.number)
+                self.timing_wheel.remove(updated_container.number)
+            else:
+                await self.reschedule([updated_container])
         except Exception as e:
             print(f"[{datetime.now()}] Erro ao buscar container {container.container_number}: {e}")
             if actual_container:
                 actual_container.add_search_log(SearchStatus.FAILURE)
                 await self.container_repository.update(actual_container)
 
-            
-                
+    async def search_bill_of_lading(self, master_bl: str, container_number: str) -> bool:
+        """Consulta o BL uma vez e atualiza todos os containers acompanhados que estão nele.
+
+        Retorna False quando a resposta não traz o container agendado, para que ele
+        seja buscado individualmente.
+        """
+        print(f"[{datetime.now().time()}] Executando busca do BL {master_bl} para {container_number}")
+        msc_response = await self.msc_service.get_tracking_info(master_bl)
+        if not msc_response or msc_response.get("IsSuccess") is False:
+            return False
+
+        containers_data = {dto.number: dto for dto in self.container_mapper.from_api_response_to_dto_models(msc_response)}
+        if container_number not in containers_data:
+            return False
+
+        tracked_containers = await self.container_repository.get_processing_by_master_bill_of_lading(master_bl)
+        pending_notifications = []
+        updated_containers = [
+            await self.container_service.compare_and_update_container(
+                tracked, containers_data[tracked.number], persist=False, pending_notifications=pending_notifications
+            )
+            for tracked in tracked_containers
+            if tracked.number in containers_data
+        ]
+        await self.container_repository.update_many(updated_containers)
+        await self.container_service.notify_changes(pending_notifications)
+        print(f"[{datetime.now().time()}] BL {master_bl} atualizou {len(updated_containers)} containers")
+
+        for updated_container in updated_containers:
+            if updated_container.number != container_number:
+                self._updated_by_bill_of_lading.add(updated_container.number)
+            if updated_container.shipping_status == ShippingStatus.FINISHED:
+                self._updated_by_bill_of_lading.discard(updated_container.number)
+                await self.search_scheduling_service.remove_container_schedule(updated_container.number)
+                self.timing_wheel.remove(updated_container.number)
+        await self.reschedule([c for c in updated_containers if c.shipping_status != ShippingStatus.FINISHED])
+        return True
+
 def get_container_search_scheduling_service() -> ContainerSearchSchedulerService:
     search_scheduling_mapper: SearchSchedulingMapper = SearchSchedulingMapper()
-    search_scheduling_repository: SearchSchedulingRepository = SearchSchedulingRepository(search_scheduling_mapper)
+    search_scheduling_repository: SearchSchedulingRepository = create_search_scheduling_repository(search_scheduling_mapper)
     search_scheduling_service: SearchSchedulingService = SearchSchedulingService(search_scheduling_repository)
     msc_service: MscService = get_msc_service()
     container_mapper: ContainerMapper = ContainerMapper()
-    container_repository: ContainerRepository = ContainerRepository(container_mapper)
+    container_repository: ContainerRepository = ContainerRepository(container_mapper, SearchLogRepository(container_mapper))
     container_service: ContainerService = ContainerService(
         container_repository,
         container_mapper,
         msc_service,
-        search_scheduling_service
+        search_scheduling_service,
+        create_notification_service()
     )
 
     return ContainerSearchSchedulerService(
@@ -118,5 +426,7 @@ def get_container_search_scheduling_service() -> ContainerSearchSchedulerService
         msc_service,
         container_repository,
         container_mapper,
-        search_scheduling_service
+        search_scheduling_service,
+        workers=SEARCH_WORKERS,
+        max_concurrency=SEARCH_MAX_CONCURRENCY
     )
\ No newline at end of file
@@ -1,33 +1,50 @@
-from src.domain.container import Container, Event
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from src.domain.container import Container
 from src.models.container_create import ContainerCreate
 from src.repositories.container_repository import ContainerRepository, get_container_repository
-from src.mappers.container_mapper import ContainerMapper, get_container_mapper
+from src.mappers.container_mapper import ContainerMapper, get_container_mapper, EXPORT_CONTAINER_FIELDS, EXPORT_EVENT_FIELDS
 from src.services.msc_service import MscService, get_msc_service
 from src.services.search_scheduling_service import SearchSchedulingService, get_search_scheduling_service
-from typing import Optional, List
+from src.services.notification_service import NotificationService, get_notification_service
+from typing import AsyncIterator, Optional, List, Tuple
 from fastapi import Depends, HTTPException
 from src.enums.SearchStatus import SearchStatus
 from src.enums.ShippingStatus import ShippingStatus
 from src.models.container_grid import ContainerGrid
 from src.models.container_dto import ContainerDTO
+from src.infrastructure.http.etag import make_etag, make_digest_etag
+
+BULK_VALIDATION_CONCURRENCY = int(os.getenv("BULK_VALIDATION_CONCURRENCY", "5"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
 
 class ContainerService:
-    def __init__(self, repository: ContainerRepository, container_mapper: ContainerMapper, msc_service: MscService, search_scheduling_service: SearchSchedulingService):
+    def __init__(self, repository: ContainerRepository, container_mapper: ContainerMapper, msc_service: MscService, search_scheduling_service: SearchSchedulingService, notification_service: NotificationService):
         self.repository = repository
         self.container_mapper = container_mapper
         self.msc_service = msc_service
         self.search_scheduling_service = search_scheduling_service
+        self.notification_service = notification_service
 
-    async def register_container(self, container_data: ContainerCreate) -> dict:
+    def _check_not_processing(self, container_data: ContainerCreate, existing_containers: List[Container]) -> None:
         # Verifica se ja existe o container no banco em acompanhamento
-        existing_containers = await self.repository.get_all_by_number(container_data.number)
         if any(
             c.shipowner.value == container_data.shipowner.value and c.shipping_status.value == ShippingStatus.PROCESSING.value
             for c in existing_containers
         ):
             raise HTTPException(status_code=400, detail="Container já está registrado!")
-        #Verifica se o container existe no site do armador
-        shipowner_response = await self.msc_service.validate_container_existence(container_data.number)
+
+    def _build_new_container(self, container_data: ContainerCreate, shipowner_response: Optional[dict], existing_containers: List[Container]) -> Container:
+        if shipowner_response is None:
+            raise HTTPException(status_code=503, detail="O site do armador está indisponível no momento. Tente novamente mais tarde.")
         if shipowner_response.get("IsSuccess") is False:
             raise HTTPException(status_code=404, detail="O número do container informado não foi localizado no site do armador")
         #Mapeia da response do armador para a entidade de dominio
@@ -50,22 +67,127 @@ class ContainerService:
             master_bill_of_lading_number=containerDto.master_bill_of_lading_number,
             house_bill_of_lading_number=container_data.house_document_number
         )
+        container.payload_fingerprint = containerDto.fingerprint
 
         container.add_search_log(SearchStatus.SUCCESS)
+        return container
+
+    async def register_container(self, container_data: ContainerCreate) -> dict:
+        existing_containers = await self.repository.get_all_by_number(container_data.number)
+        self._check_not_processing(container_data, existing_containers)
+        #Verifica se o container existe no site do armador
+        shipowner_response = await self.msc_service.validate_container_existence(container_data.number)
+        container = self._build_new_container(container_data, shipowner_response, existing_containers)
 
-        
         await self.repository.save(container)
         if container.shipping_status == ShippingStatus.PROCESSING:
             await self.search_scheduling_service.add_container_schedule(container.number)
         return {"message": "Container registrado com sucesso!", "data": container_data.dict()}
 
+    async def register_containers(self, containers_data: List[ContainerCreate]) -> dict:
+        """Registra vários containers: valida no armador com concorrência limitada,
+        insere todos de uma vez e aloca os horários de busca numa única atualização"""
+        if len(containers_data) > BULK_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Envie no máximo {BULK_MAX_ITEMS} containers por requisição.")
+        results = [
+            {"index": index, "number": data.number, "success": False, "id": None, "detail": None}
+            for index, data in enumerate(containers_data)
+        ]
+
+        existing_by_number = defaultdict(list)
+        for existing in await self.repository.get_all_by_numbers(list({data.number for data in containers_data})):
+            existing_by_number[existing.number].append(existing)
+
+        pending = []
+        seen = set()
+        for index, data in enumerate(containers_data):
+            key = (data.number, data.shipowner.value)
+            if key in seen:
+                results[index]["detail"] = "Container repetido na requisição."
+                continue
+            seen.add(key)
+            try:
+                self._check_not_processing(data, existing_by_number[data.number])
+            except HTTPException as e:
+                results[index]["detail"] = e.detail
+                continue
+            pending.append(index)
+
+        semaphore = asyncio.Semaphore(BULK_VALIDATION_CONCURRENCY)
+
+        async def validate(index: int) -> Optional[Container]:
+            data = containers_data[index]
+            try:
+                async with semaphore:
+                    shipowner_response = await self.msc_service.validate_container_existence(data.number, hedge=False)
+                return self._build_new_container(data, shipowner_response, existing_by_number[data.number])
+            except HTTPException as e:
+                results[index]["detail"] = e.detail
+            except Exception as e:
+                results[index]["detail"] = f"Erro inesperado: {str(e)}"
+            return None
+
+        built = await asyncio.gather(*(validate(index) for index in pending))
+        new_containers = [(index, container) for index, container in zip(pending, built) if container is not None]
+
+        save_errors = await self.repository.save_many([container for _, container in new_containers])
+        for position, (index, container) in enumerate(new_containers):
+            if position in save_errors:
+                results[index]["detail"] = f"Erro ao gravar: {save_errors[position]}"
+        new_containers = [item for position, item in enumerate(new_containers) if position not in save_errors]
+        for index, container in new_containers:
+            results[index].update(success=True, id=container._id, detail="Container registrado com sucesso!")
+
+        processing_numbers = [
+            container.number for _, container in new_containers
+            if container.shipping_status == ShippingStatus.PROCESSING
+        ]
+        await self.search_scheduling_service.add_container_schedules(processing_numbers)
+
+        registered = len(new_containers)
+        return {
+            "message": f"{registered} de {len(containers_data)} containers registrados.",
+            "registered": registered,
+            "failed": len(containers_data) - registered,
+            "results": results
+        }
+
     async def find_by_container_number_to_telegram(self, container_number: str) -> Optional[dict]:
         container = await self.repository.get_by_number_to_telegram(container_number)
         if container:
-            return self.container_mapper.from_domain_to_view(container)
+            search_logs = await self.repository.find_search_logs(container._id)
+            return self.container_mapper.from_domain_to_view(container, search_logs)
         return None       
     
-    async def compare_and_update_container(self, existing: Container, new_data: ContainerDTO) -> Container:
+    async def find_revision_by_number(self, container_number: str, processing_only: bool = False) -> Optional[Tuple[str, int]]:
+        document = await self.repository.get_revision_by_number(container_number, processing_only)
+        if document is None:
+            return None
+        return str(document["_id"]), document.get("version", 0)
+
+    async def notify_changes(self, container_changes: List[Tuple[Container, List[str]]]) -> None:
+        # Falha na outbox não pode interromper a rotina de busca
+        try:
+            await self.notification_service.enqueue_many(container_changes)
+        except Exception as e:
+            print(f"Erro ao registrar notificações de alteração: {str(e)}")
+
+    async def compare_and_update_container(
+            self,
+            existing: Container,
+            new_data: ContainerDTO,
+            persist: bool = True,
+            pending_notifications: Optional[List[Tuple[Container, List[str]]]] = None) -> Container:
+        """Aplica os dados do armador ao container. Com persist=False as alterações detectadas
+        vão para pending_notifications, para serem notificadas depois da gravação em lote"""
+        # Mesmo payload da última busca: registra o sucesso sem refazer a comparação
+        if new_data.fingerprint is not None and new_data.fingerprint == existing.payload_fingerprint:
+            existing.add_search_log(SearchStatus.SUCCESS)
+            if persist:
+                await self.repository.update(existing)
+            print(f"Nenhuma mudança no payload do contêiner {existing.number}.")
+            return existing
+
         changes = []
 
         if existing.master_bill_of_lading_number != new_data.master_bill_of_lading_number:
@@ -88,29 +210,29 @@ class ContainerService:
             existing.port_of_discharge = new_data.port_of_discharge
             changes.append("Porto de Desembarque alterado")
 
-        # Comparação mais detalhada dos eventos
-        old_events = {self.event_key(e): e for e in existing.events}
-        new_events = {self.event_key(e): e for e in new_data.events}
-
-        added_keys = new_events.keys() - old_events.keys()
-        removed_keys = old_events.keys() - new_events.keys()
-        common_keys = old_events.keys() & new_events.keys()
+        # Comparação dos eventos pela ordem, com busca O(1) na coleção indexada do container
+        new_events = {event.order: event for event in new_data.events}
+        added_orders = [order for order in new_events if order not in existing.events]
+        removed_orders = [event.order for event in existing.events if event.order not in new_events]
+        common_orders = [order for order in new_events if order in existing.events]
 
-        for key in added_keys:
-            changes.append(f"Novo evento adicionado: {new_events[key].description} em {new_events[key].location}")
-            existing.add_event(new_events[key])
+        for order in added_orders:
+            new_event = new_events[order]
+            changes.append(f"Novo evento adicionado: {new_event.description} em {new_event.location}")
+            existing.add_event(new_event)
 
-        for key in removed_keys:
-            changes.append(f"Evento removido: {old_events[key].description} em {old_events[key].location}")
-            existing.remove_event_by_order(old_events[key].order)
+        for order in removed_orders:
+            old_event = existing.get_event(order)
+            changes.append(f"Evento removido: {old_event.description} em {old_event.location}")
+            existing.remove_event_by_order(order)
 
-        for key in common_keys:
-            old_event = old_events[key]
-            new_event = new_events[key]
+        for order in common_orders:
+            old_event = existing.get_event(order)
+            new_event = new_events[order]
             new_event.set_event_status()
             if new_event.estimated_date is None and old_event.estimated_date is not None:
                 new_event.estimated_date = old_event.estimated_date
-            if old_event.__dict__ != new_event.__dict__:
+            if old_event.as_tuple() != new_event.as_tuple():
                 changes.append(f"Evento atualizado: {old_event.estimated_date} → {new_event.estimated_date} | {old_event.effective_date} → {new_event.effective_date} | {old_event.location} → {new_event.location} | "
                                f"{old_event.un_location_code} → {new_event.un_location_code} | {old_event.description} → {new_event.description} | "
                                f"{old_event.detail} → {new_event.detail}")
@@ -119,34 +241,107 @@ class ContainerService:
 
         existing.add_search_log(SearchStatus.SUCCESS)
         existing.set_shipping_status()
-        await self.repository.update(existing)
+        existing.payload_fingerprint = new_data.fingerprint
+        if persist:
+            await self.repository.update(existing)
         if changes:
-                for change in changes:
-                    print(change)
+            for change in changes:
+                print(change)
+            if persist:
+                await self.notify_changes([(existing, changes)])
+            elif pending_notifications is not None:
+                pending_notifications.append((existing, changes))
         else:
             print("Nenhuma mudança detectada nas informações do contêiner.")
 
         return existing
 
-    def event_key(self, event: Event) -> str:
-        # Chave única do evento
-        return f"{event.order}"
-    
-    async def get_paginated_grid(self, search: Optional[str], page: int, page_size: int):
-        items = await self.repository.find_all_for_grid(search, page, page_size)
+    def encode_grid_cursor(self, last_id) -> str:
+        payload = json.dumps({"after": str(last_id)}).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_grid_cursor(self, cursor: str) -> str:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            after_id = json.loads(base64.urlsafe_b64decode(padded))["after"]
+            ObjectId(after_id)
+            return after_id
+        except (ValueError, KeyError, TypeError, InvalidId):
+            raise HTTPException(status_code=400, detail="Cursor de paginação inválido.")
+
+    def container_etag(self, id: str, version: int) -> str:
+        return make_etag(id, version)
+
+    def grid_etag(self, total: int, documents: List[dict]) -> str:
+        return make_digest_etag([total] + [f"{doc['_id']}:{doc.get('version', 0)}" for doc in documents])
+
+    async def get_container_etag(self, id: str) -> Optional[str]:
+        """ETag atual do container a partir de uma leitura só da revisão"""
+        version = await self.repository.get_version(id)
+        if version is None:
+            return None
+        return self.container_etag(id, version)
+
+    async def get_grid_etag(self, search: Optional[str], page: int, page_size: int, cursor: Optional[str] = None) -> str:
+        after_id = self.decode_grid_cursor(cursor) if cursor else None
+        documents = await self.repository.find_grid_versions(search, page, page_size, after_id)
+        total = await self.repository.count_all_for_grid(search)
+        return self.grid_etag(total, documents)
+
+    async def get_paginated_grid(self, search: Optional[str], page: int, page_size: int, cursor: Optional[str] = None):
+        after_id = self.decode_grid_cursor(cursor) if cursor else None
+        items = await self.repository.find_all_for_grid(search, page, page_size, after_id)
         total = await self.repository.count_all_for_grid(search)
+        next_cursor = self.encode_grid_cursor(items[-1]["_id"]) if len(items) == page_size else None
         return {
             "items": [self.container_mapper.to_container_grid(doc) for doc in items],
             "total": total,
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "etag": self.grid_etag(total, items)
         }
 
         
+    def export_columns(self, per_event: bool) -> List[str]:
+        columns = list(EXPORT_CONTAINER_FIELDS)
+        if per_event:
+            columns.extend(f"event_{field}" for field in EXPORT_EVENT_FIELDS)
+        return columns
+
+    @staticmethod
+    def _to_csv_value(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, list):
+            # Ex.: o detalhe dos eventos, uma lista de textos
+            return "; ".join(str(item) for item in value)
+        return value
+
+    async def export_containers(self, search: Optional[str], export_format: str, per_event: bool) -> AsyncIterator[str]:
+        """Gera a exportação linha a linha, sem carregar o conjunto inteiro em memória"""
+        columns = self.export_columns(per_event)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        if export_format == "csv":
+            writer.writeheader()
+            yield buffer.getvalue()
+
+        async for document in self.repository.iter_for_export(search, include_events=per_event):
+            for row in self.container_mapper.to_export_rows(document, per_event):
+                if export_format == "csv":
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow({key: self._to_csv_value(value) for key, value in row.items()})
+                    yield buffer.getvalue()
+                else:
+                    yield json.dumps(row, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value), ensure_ascii=False) + "\n"
+
     async def get_container_by_id (self, id: str) -> Optional[dict]:
         container = await self.repository.get_by_id(id)
         if container:
-            return self.container_mapper.from_domain_to_view(container)
+            search_logs = await self.repository.find_search_logs(container._id)
+            return self.container_mapper.from_domain_to_view(container, search_logs)
         return None  
 
     async def delete_container_by_id(self, id: str) -> dict:
@@ -193,6 +388,7 @@ def get_container_service(
     repository: ContainerRepository = Depends(get_container_repository), 
     container_mapper: ContainerMapper = Depends(get_container_mapper),
     msc_service: MscService = Depends(get_msc_service),
-    search_scheduling_service: SearchSchedulingService = Depends(get_search_scheduling_service)
+    search_scheduling_service: SearchSchedulingService = Depends(get_search_scheduling_service),
+    notification_service: NotificationService = Depends(get_notification_service)
 ) -> ContainerService:
-    return ContainerService(repository, container_mapper, msc_service, search_scheduling_service)
\ No newline at end of file
+    return ContainerService(repository, container_mapper, msc_service, search_scheduling_service, notification_service)
\ No newline at end of file
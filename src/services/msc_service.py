@@ -1,11 +1,96 @@
-import requests
+import asyncio
+import os
+from typing import Optional
+import httpx
+from src.infrastructure.http.http_client import get_http_client
+from src.infrastructure.cache.ttl_cache import TTLCache
+from src.infrastructure.cache.single_flight import SingleFlight
+from src.infrastructure.resilience.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.infrastructure.resilience.hedging import hedged
+from src.infrastructure.resilience.retry import DeadlineExceeded, retry_with_backoff
+
+MSC_CACHE_TTL_SECONDS = float(os.getenv("MSC_CACHE_TTL_SECONDS", "60"))
+MSC_CACHE_MAX_SIZE = int(os.getenv("MSC_CACHE_MAX_SIZE", "1024"))
+MSC_CALL_DEADLINE_SECONDS = float(os.getenv("MSC_CALL_DEADLINE_SECONDS", "30"))
+MSC_RETRY_ATTEMPTS = int(os.getenv("MSC_RETRY_ATTEMPTS", "3"))
+MSC_RETRY_BASE_DELAY_SECONDS = float(os.getenv("MSC_RETRY_BASE_DELAY_SECONDS", "0.5"))
+MSC_RETRY_MAX_DELAY_SECONDS = float(os.getenv("MSC_RETRY_MAX_DELAY_SECONDS", "8"))
+MSC_CIRCUIT_FAILURE_RATE = float(os.getenv("MSC_CIRCUIT_FAILURE_RATE", "0.5"))
+MSC_CIRCUIT_WINDOW = int(os.getenv("MSC_CIRCUIT_WINDOW", "20"))
+MSC_CIRCUIT_MIN_CALLS = int(os.getenv("MSC_CIRCUIT_MIN_CALLS", "10"))
+MSC_CIRCUIT_OPEN_SECONDS = float(os.getenv("MSC_CIRCUIT_OPEN_SECONDS", "120"))
+# Consultas interativas disparam uma segunda requisição após esse atraso; 0 desativa
+MSC_HEDGE_DELAY_SECONDS = float(os.getenv("MSC_HEDGE_DELAY_SECONDS", "0"))
+
+# Compartilhados por todas as instâncias: API, bot do Telegram e agendador
+_tracking_cache = TTLCache(MSC_CACHE_TTL_SECONDS, max_size=MSC_CACHE_MAX_SIZE)
+_tracking_flights = SingleFlight()
+_circuit_breaker = CircuitBreaker(
+    failure_rate_threshold=MSC_CIRCUIT_FAILURE_RATE,
+    window_size=MSC_CIRCUIT_WINDOW,
+    min_calls=MSC_CIRCUIT_MIN_CALLS,
+    open_seconds=MSC_CIRCUIT_OPEN_SECONDS
+)
+
+
+class TransientCarrierError(Exception):
+    """Falha passageira do armador (timeout, conexão, 429 ou 5xx), que vale tentar de novo"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class MscService:
+    TRACKING_URL = "https://www.msc.com/api/feature/tools/TrackingInfo"
+
+    async def get_tracking_info(self, tracking_number, hedge: bool = False):
+        cached = _tracking_cache.get(tracking_number)
+        if cached is not None:
+            return cached
+        # Consultas simultâneas do mesmo número compartilham uma única requisição
+        return await _tracking_flights.do(tracking_number, lambda: self._fetch_and_cache(tracking_number, hedge))
+
+    async def _fetch_and_cache(self, tracking_number, hedge: bool):
+        response = await self.fetch_tracking_info(tracking_number, hedge)
+        # Falhas do armador não são guardadas, para que a próxima consulta tente de novo
+        if response is not None and response.get("IsSuccess") is not False:
+            _tracking_cache.set(tracking_number, response)
+        return response
+
+    async def fetch_tracking_info(self, tracking_number, hedge: bool = False):
+        """Consulta o armador com prazo total, novas tentativas e disjuntor; None em caso de falha"""
+        try:
+            if hedge and MSC_HEDGE_DELAY_SECONDS > 0:
+                # As cópias levantam exceção ao falhar, então só uma resposta real encerra a disputa
+                return await hedged(
+                    lambda: self._fetch_with_retry(tracking_number),
+                    MSC_HEDGE_DELAY_SECONDS,
+                    can_hedge=lambda: _circuit_breaker.state == CircuitBreaker.CLOSED
+                )
+            return await self._fetch_with_retry(tracking_number)
+        except CircuitOpenError:
+            print(f"Circuito do armador aberto, consulta de {tracking_number} não realizada")
+        except DeadlineExceeded:
+            print(f"Prazo de {MSC_CALL_DEADLINE_SECONDS}s esgotado na consulta de {tracking_number}")
+        except TransientCarrierError as e:
+            print(f"Erro na requisição ao armador para {tracking_number}: {e}")
+        return None
+
+    async def _fetch_with_retry(self, tracking_number):
+        return await retry_with_backoff(
+            lambda: self._request_tracking_info(tracking_number),
+            attempts=MSC_RETRY_ATTEMPTS,
+            base_delay=MSC_RETRY_BASE_DELAY_SECONDS,
+            max_delay=MSC_RETRY_MAX_DELAY_SECONDS,
+            deadline=MSC_CALL_DEADLINE_SECONDS,
+            retry_on=(TransientCarrierError,)
+        )
+
+    async def _request_tracking_info(self, tracking_number):
+        if not _circuit_breaker.allow_request():
+            raise CircuitOpenError()
 
-    async def get_tracking_info(self, tracking_number):
-        url = "https://www.msc.com/api/feature/tools/TrackingInfo"
-        
         headers = {
             "accept": "application/json, text/plain, */*",
             "content-type": "application/json",
@@ -17,17 +102,50 @@ class MscService:
             "trackingMode": "0"
         }
 
-        response = requests.post(url, json=payload, headers=headers)
-        
+        try:
+            response = await get_http_client().post(self.TRACKING_URL, json=payload, headers=headers)
+        except httpx.HTTPError as e:
+            _circuit_breaker.record_failure()
+            raise TransientCarrierError(repr(e))
+        except asyncio.CancelledError:
+            # Cancelada pelo prazo ou por uma requisição paralela mais rápida: sem resultado
+            _circuit_breaker.release_probe()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            _circuit_breaker.record_failure()
+            retry_after = response.headers.get("retry-after")
+            raise TransientCarrierError(
+                f"Erro {response.status_code}",
+                float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+
+        _circuit_breaker.record_success()
         if response.status_code == 200:
             return response.json()  # Retorna os dados em formato JSON
         else:
             print(f"Erro {response.status_code}: {response.text}")
             return None
         
-    async def validate_container_existence(self, container_number):
-        response = await self.get_tracking_info(container_number)
+    async def validate_container_existence(self, container_number, hedge: bool = True):
+        response = await self.get_tracking_info(container_number, hedge=hedge)
         return response
 
+    def is_available(self) -> bool:
+        """Indica se o disjuntor aceita chamadas ao armador"""
+        return _circuit_breaker.state != CircuitBreaker.OPEN
+
+    def seconds_until_available(self) -> float:
+        return _circuit_breaker.seconds_until_retry()
+
+    def circuit_stats(self) -> dict:
+        return _circuit_breaker.stats()
+
+    def cache_stats(self) -> dict:
+        stats = _tracking_cache.stats()
+        stats["coalesced"] = _tracking_flights.shared
+        stats["in_flight"] = len(_tracking_flights)
+        return stats
+
 def get_msc_service():
     return MscService()
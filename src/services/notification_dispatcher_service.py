@@ -0,0 +1,141 @@
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, List, Optional
+from telegram.error import Forbidden, RetryAfter, TelegramError
+from src.infrastructure.rate_limit.token_bucket import TokenBucket
+from src.repositories.notification_outbox_repository import NotificationOutboxRepository, get_notification_outbox_repository
+from src.repositories.subscription_repository import SubscriptionRepository, get_subscription_repository
+
+# Chats atendidos por rodada e notificações reservadas de cada um
+NOTIFICATION_CHATS_PER_ROUND = int(os.getenv("NOTIFICATION_CHATS_PER_ROUND", "100"))
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))
+NOTIFICATION_LEASE_SECONDS = float(os.getenv("NOTIFICATION_LEASE_SECONDS", "60"))
+NOTIFICATION_POLL_SECONDS = float(os.getenv("NOTIFICATION_POLL_SECONDS", "2"))
+NOTIFICATION_GLOBAL_RATE = float(os.getenv("NOTIFICATION_GLOBAL_RATE", "25"))
+NOTIFICATION_CHAT_RATE = float(os.getenv("NOTIFICATION_CHAT_RATE", "1"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_SECONDS = float(os.getenv("NOTIFICATION_RETRY_SECONDS", "30"))
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+class NotificationDispatcherService:
+    """Consome a outbox em segundo plano: agrupa por chat, junta as alterações numa
+    mensagem e envia respeitando os limites global e por chat do Telegram"""
+
+    def __init__(
+            self,
+            bot,
+            outbox_repository: NotificationOutboxRepository,
+            subscription_repository: SubscriptionRepository,
+            global_rate: float = NOTIFICATION_GLOBAL_RATE,
+            chat_rate: float = NOTIFICATION_CHAT_RATE):
+        self.bot = bot
+        self.outbox_repository = outbox_repository
+        self.subscription_repository = subscription_repository
+        self.chat_rate = chat_rate
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        print("[Notificações] Despachante iniciado.")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                sent = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Notificações] Erro ao despachar: {e}")
+                sent = 0
+            if not sent:
+                await asyncio.sleep(NOTIFICATION_POLL_SECONDS)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Baldes cheios equivalem a novos, então podem ser descartados
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets = {key: value for key, value in self._chat_buckets.items() if not value.is_full}
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, capacity=1)
+        return bucket
+
+    def build_messages(self, notifications: List[dict]) -> List[tuple]:
+        """Junta as alterações de um chat por container, em mensagens dentro do limite do Telegram"""
+        by_container: "OrderedDict[str, dict]" = OrderedDict()
+        for notification in notifications:
+            entry = by_container.setdefault(notification["container_number"], {"ids": [], "changes": []})
+            entry["ids"].append(notification["_id"])
+            entry["changes"].extend(notification["changes"])
+
+        messages = []
+        text, ids = "🔔 Atualizações dos seus containers\n", []
+        for container_number, entry in by_container.items():
+            block = f"\n📦 {container_number}\n" + "".join(f"• {change}\n" for change in entry["changes"])
+            if len(block) > TELEGRAM_MESSAGE_LIMIT - 100:
+                block = block[:TELEGRAM_MESSAGE_LIMIT - 101] + "…\n"
+            if ids and len(text) + len(block) > TELEGRAM_MESSAGE_LIMIT:
+                messages.append((text, ids))
+                text, ids = "🔔 Atualizações dos seus containers\n", []
+            text += block
+            ids.extend(entry["ids"])
+        if ids:
+            messages.append((text, ids))
+        return messages
+
+    async def dispatch_once(self) -> int:
+        # Chats no limite ficam de fora antes do corte, para não ocuparem a rodada dos demais
+        throttled = [chat_id for chat_id, bucket in self._chat_buckets.items() if not bucket.has_tokens]
+        chat_ids = await self.outbox_repository.find_pending_chats(NOTIFICATION_CHATS_PER_ROUND, exclude=throttled)
+
+        sent = 0
+        for chat_id in chat_ids:
+            notifications = await self.outbox_repository.claim_chat(chat_id, NOTIFICATION_LEASE_SECONDS, NOTIFICATION_BATCH_SIZE)
+            messages = self.build_messages(notifications)
+            unsent = []
+            for index, (text, ids) in enumerate(messages):
+                # Chat no limite: o restante volta para a fila e segue numa próxima rodada
+                if not self._chat_bucket(chat_id).try_acquire():
+                    unsent = messages[index:]
+                    break
+                await self.global_bucket.acquire()
+                if not await self._send(chat_id, text, ids):
+                    unsent = messages[index + 1:]
+                    break
+                sent += 1
+            await self.outbox_repository.release([notification_id for _, ids in unsent for notification_id in ids])
+        return sent
+
+    async def _send(self, chat_id: int, text: str, ids: list) -> bool:
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+        except RetryAfter as e:
+            # Controle de flood: segura todos os envios pelo tempo pedido
+            retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else float(e.retry_after)
+            self.global_bucket.pause(retry_after)
+            await self.outbox_repository.release(ids)
+            return False
+        except Forbidden as e:
+            # Usuário bloqueou o bot: não adianta tentar de novo
+            await self.outbox_repository.discard_chat(chat_id, str(e))
+            await self.subscription_repository.unsubscribe_chat(chat_id)
+            return False
+        except TelegramError as e:
+            await self.outbox_repository.mark_failed(
+                ids, str(e), timedelta(seconds=NOTIFICATION_RETRY_SECONDS), NOTIFICATION_MAX_ATTEMPTS
+            )
+            return False
+        await self.outbox_repository.mark_sent(ids)
+        return True
+
+def create_notification_dispatcher_service(bot) -> NotificationDispatcherService:
+    return NotificationDispatcherService(bot, get_notification_outbox_repository(), get_subscription_repository())
@@ -0,0 +1,49 @@
+from typing import List, Optional, Tuple
+from fastapi import Depends
+from src.domain.container import Container
+from src.repositories.subscription_repository import SubscriptionRepository, get_subscription_repository
+from src.repositories.notification_outbox_repository import NotificationOutboxRepository, get_notification_outbox_repository
+
+class NotificationService:
+    def __init__(self, subscription_repository: SubscriptionRepository, outbox_repository: NotificationOutboxRepository):
+        self.subscription_repository = subscription_repository
+        self.outbox_repository = outbox_repository
+
+    async def subscribe(self, chat_id: int, container_id: str, container_number: str) -> bool:
+        return await self.subscription_repository.subscribe(chat_id, container_id, container_number)
+
+    async def unsubscribe(self, chat_id: int, container_number: str) -> bool:
+        return await self.subscription_repository.unsubscribe(chat_id, container_number)
+
+    async def list_subscriptions(self, chat_id: int) -> List[str]:
+        return await self.subscription_repository.find_by_chat(chat_id)
+
+    async def enqueue_changes(self, container: Container, changes: List[str]) -> None:
+        await self.enqueue_many([(container, changes)])
+
+    async def enqueue_many(self, container_changes: List[Tuple[Container, List[str]]]) -> None:
+        """Grava na outbox uma notificação por chat inscrito; o envio fica com o despachante"""
+        container_changes = [(container, changes) for container, changes in container_changes if changes and container._id]
+        if not container_changes:
+            return
+
+        chats = await self.subscription_repository.find_chats_by_containers([container._id for container, _ in container_changes])
+        await self.outbox_repository.add_many([
+            {
+                "chat_id": chat_id,
+                "container_id": container._id,
+                "container_number": container.number,
+                "changes": changes
+            }
+            for container, changes in container_changes
+            for chat_id in chats.get(container._id, [])
+        ])
+
+def create_notification_service() -> NotificationService:
+    return NotificationService(get_subscription_repository(), get_notification_outbox_repository())
+
+def get_notification_service(
+    subscription_repository: SubscriptionRepository = Depends(get_subscription_repository),
+    outbox_repository: NotificationOutboxRepository = Depends(get_notification_outbox_repository)
+) -> NotificationService:
+    return NotificationService(subscription_repository, outbox_repository)
@@ -1,91 +1,120 @@
-from typing import List
-from src.domain.search_scheduling import SearchScheduling, ContainerSchedule
+from typing import List, Optional
+from src.domain.search_scheduling import (
+    SearchScheduling,
+    ContainerSchedule,
+    DEFAULT_START_SEARCH_TIME,
+    DEFAULT_END_SEARCH_TIME
+)
+from src.domain.search_gap_index import SearchGapIndex
 from src.repositories.search_scheduling_repository import SearchSchedulingRepository, get_search_scheduling_repository
-from datetime import time
 from fastapi import Depends
 
+# Índice compartilhado entre as instâncias do serviço (criadas por requisição)
+_gap_index: Optional[SearchGapIndex] = None
+
 class SearchSchedulingService:
     def __init__(self, repository: SearchSchedulingRepository):
         self.repository = repository
 
-    async def add_container_schedule(self, container_number: str) -> SearchScheduling:
+    async def get_gap_index(self) -> Optional[SearchGapIndex]:
+        """Retorna o índice de intervalos, reconstruindo-o apenas se o agendamento mudou"""
+        global _gap_index
+        version = await self.repository.get_version()
+        if version is None:
+            _gap_index = None
+            return None
+        if _gap_index is not None and _gap_index.version == version:
+            return _gap_index
+
         scheduling = await self.repository.get()
-        
         if not scheduling:
+            _gap_index = None
+            return None
+
+        _gap_index = SearchGapIndex(
+            scheduling.end_search_time,
+            ((cs.container_number, cs.search_time) for cs in scheduling.containers),
+            version
+        )
+        return _gap_index
+
+    def _track_version(self, gap_index: SearchGapIndex, new_version: Optional[int]) -> None:
+        # Se outra instância escreveu no meio tempo, força a reconstrução na próxima chamada
+        if new_version is not None and gap_index.version is not None and new_version == gap_index.version + 1:
+            gap_index.version = new_version
+        else:
+            gap_index.version = None
+
+    async def add_container_schedule(self, container_number: str) -> ContainerSchedule:
+        gap_index = await self.get_gap_index()
+        
+        if gap_index is None:
             scheduling = SearchScheduling(
-                start_search_time=time(8, 0, 0),
-                end_search_time=time(20, 0, 0)
+                start_search_time=DEFAULT_START_SEARCH_TIME,
+                end_search_time=DEFAULT_END_SEARCH_TIME
             )
-            scheduling.add_container_schedule(ContainerSchedule(container_number, scheduling.start_search_time)),  # Primeiro container recebe 08:00
+            container_schedule = ContainerSchedule(container_number, scheduling.start_search_time)  # Primeiro container recebe 08:00
+            scheduling.add_container_schedule(container_schedule)
             await self.repository.save(scheduling)
-            return scheduling
-        
-        # Se já existirem agendamentos, devemos calcular o novo horário
-        new_search_time = self.calculate_next_search_time(scheduling)
+            return container_schedule
         
-        # Adiciona o novo container e seu horário de busca
-        scheduling.add_container_schedule(ContainerSchedule(container_number, new_search_time))
-        await self.repository.save(scheduling)
-        
-        return scheduling
-
-    def calculate_next_search_time(self, scheduling: SearchScheduling) -> time:
-        """Calcula o próximo horário de busca, seguindo as regras de alocação"""
-        # Ordena os horários existentes
-        sorted_times = sorted([container.search_time for container in scheduling.containers])
-        # Se houver mais de dois horários, calcula o ponto médio entre os horários mais distantes
-        if len(sorted_times) >= 2:
-            max_gap_index = self.find_max_gap_index(sorted_times)
-            new_search_time = self.calculate_mid_time(sorted_times[max_gap_index], sorted_times[max_gap_index + 1])
-        else:
-            # Caso contrário, entre os dois primeiros horários (08:00 e 20:00), aloca o ponto médio
-            new_search_time = scheduling.end_search_time
+        # Aloca o ponto médio do maior intervalo em O(log n)
+        container_schedule = ContainerSchedule(container_number, gap_index.allocate(container_number))
+        try:
+            new_version = await self.repository.add_container(container_schedule)
+        except Exception:
+            gap_index.remove(container_number)
+            raise
+        self._track_version(gap_index, new_version)
         
-        return new_search_time
+        return container_schedule
+    
+    async def add_container_schedules(self, container_numbers: List[str]) -> List[ContainerSchedule]:
+        """Aloca horários para vários containers e grava todos numa única atualização do agendamento"""
+        global _gap_index
+        if not container_numbers:
+            return []
+        gap_index = await self.get_gap_index()
 
-    def find_max_gap_index(self, sorted_times: List[time]) -> int:
-        """Encontra o índice do maior intervalo entre horários"""
-        max_gap = 0
-        max_gap_index = 0
-        
-        for i in range(len(sorted_times) - 1):
-            gap = self.time_difference_in_seconds(sorted_times[i], sorted_times[i + 1])
-            if gap > max_gap:
-                max_gap = gap
-                max_gap_index = i
-        
-        return max_gap_index
+        if gap_index is None:
+            scheduling = SearchScheduling(
+                start_search_time=DEFAULT_START_SEARCH_TIME,
+                end_search_time=DEFAULT_END_SEARCH_TIME
+            )
+            first_schedule = ContainerSchedule(container_numbers[0], scheduling.start_search_time)
+            gap_index = SearchGapIndex(
+                scheduling.end_search_time,
+                [(first_schedule.container_number, first_schedule.search_time)],
+                None
+            )
+            container_schedules = [first_schedule] + [
+                ContainerSchedule(number, gap_index.allocate(number)) for number in container_numbers[1:]
+            ]
+            for container_schedule in container_schedules:
+                scheduling.add_container_schedule(container_schedule)
+            await self.repository.save(scheduling)
+            # Versão desconhecida após o save: o índice é reconstruído na próxima chamada
+            _gap_index = gap_index
+            return container_schedules
 
-    def calculate_mid_time(self, start_time: time, end_time: time) -> time:
-        """Calcula o ponto médio entre dois horários em segundos"""
-        start_seconds = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
-        end_seconds = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
-        mid_seconds = (start_seconds + end_seconds) // 2
+        container_schedules = [ContainerSchedule(number, gap_index.allocate(number)) for number in container_numbers]
+        try:
+            new_version = await self.repository.add_containers(container_schedules)
+        except Exception:
+            for container_schedule in container_schedules:
+                gap_index.remove(container_schedule.container_number)
+            raise
+        self._track_version(gap_index, new_version)
 
-        hours = mid_seconds // 3600
-        minutes = (mid_seconds % 3600) // 60
-        seconds = mid_seconds % 60
+        return container_schedules
 
-        return time(hour=hours, minute=minutes, second=seconds)
-    
-    def time_difference_in_seconds(self, start_time: time, end_time: time) -> int:
-        """Calcula a diferença em segundos entre dois horários"""
-        start_seconds = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
-        end_seconds = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
-        return end_seconds - start_seconds
-    
     async def remove_container_schedule(self, container_number: str):
         try:
-            scheduling = await self.repository.get()
-
-            if not scheduling or not scheduling.containers:
-                return
-
-            was_removed = scheduling.remove_container_by_number(container_number)
-
-            if was_removed:
-                await self.repository.update(scheduling)
-
+            new_version = await self.repository.remove_container(container_number)
+            was_removed = new_version is not None
+            if was_removed and _gap_index is not None:
+                _gap_index.remove(container_number)
+                self._track_version(_gap_index, new_version)
             return was_removed
         except Exception as e:
             print(f"Erro ao remover agendamento do container: {str(e)}")
@@ -94,4 +123,4 @@ class SearchSchedulingService:
 def get_search_scheduling_service(
     repository: SearchSchedulingRepository = Depends(get_search_scheduling_repository)
 ) -> SearchSchedulingService:
-    return SearchSchedulingService(repository)
\ No newline at end of file
+    return SearchSchedulingService(repository)
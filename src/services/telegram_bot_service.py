@@ -2,31 +2,166 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKe
 from telegram.ext import CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
 from src.services.container_service import ContainerService
 from src.repositories.container_repository import ContainerRepository
+from src.repositories.search_log_repository import SearchLogRepository
 from src.mappers.container_mapper import get_container_mapper
 from src.services.msc_service import get_msc_service
 from src.services.search_scheduling_service import SearchSchedulingService
-from src.repositories.search_scheduling_repository import SearchSchedulingRepository
+from src.services.notification_service import create_notification_service
+from src.repositories.search_scheduling_repository import create_search_scheduling_repository
 from src.mappers.search_scheduling_mapper import get_search_scheduling_mapper
 from src.enums.Shipowners import Shipowners
 from src.models.container_create import ContainerCreate
+from src.models.container_view import ContainerView
+from src.infrastructure.cache.ttl_cache import TTLCache
+from typing import Optional
+import os
 import re
 
+TELEGRAM_EVENTS_PER_PAGE = int(os.getenv("TELEGRAM_EVENTS_PER_PAGE", "5"))
+TELEGRAM_SEARCH_LOGS_PER_PAGE = int(os.getenv("TELEGRAM_SEARCH_LOGS_PER_PAGE", "20"))
+TELEGRAM_PAGE_CACHE_TTL_SECONDS = float(os.getenv("TELEGRAM_PAGE_CACHE_TTL_SECONDS", "900"))
+
+# Páginas já formatadas por (id, versão); uma nova escrita muda a versão e invalida a entrada
+_rendered_pages = TTLCache(TELEGRAM_PAGE_CACHE_TTL_SECONDS, max_size=512)
+
+PAGE_CALLBACK_PREFIX = "pg"
+SUMMARY_PAGE = "s"
+EVENTS_PAGE = "e"
+SEARCH_LOGS_PAGE = "l"
+CALLBACK_DATA_LIMIT = 64
+PAGE_CALLBACK_PATTERN = re.compile(
+    rf"^{PAGE_CALLBACK_PREFIX}:([0-9a-f]{{24}}):(\d+):([{SUMMARY_PAGE}{EVENTS_PAGE}{SEARCH_LOGS_PAGE}]):(\d+)$"
+)
+
 class TelegramBotService:
     def __init__(self):
         container_mapper = get_container_mapper()
-        container_repository = ContainerRepository(container_mapper)
+        container_repository = ContainerRepository(container_mapper, SearchLogRepository(container_mapper))
         msc_service = get_msc_service()
         search_scheduling_mapper = get_search_scheduling_mapper()
-        search_scheduling_repository = SearchSchedulingRepository(search_scheduling_mapper)
+        search_scheduling_repository = create_search_scheduling_repository(search_scheduling_mapper)
         search_scheduling_service = SearchSchedulingService(search_scheduling_repository)
+        self.notification_service = create_notification_service()
 
         self.container_service = ContainerService(
             container_repository,
             container_mapper,
             msc_service,
-            search_scheduling_service
+            search_scheduling_service,
+            self.notification_service
+        )
+
+    def _render_pages(self, view: ContainerView) -> dict:
+        return {
+            SUMMARY_PAGE: [view.to_telegram_summary()],
+            EVENTS_PAGE: view.to_telegram_event_pages(TELEGRAM_EVENTS_PER_PAGE),
+            SEARCH_LOGS_PAGE: view.to_telegram_search_log_pages(TELEGRAM_SEARCH_LOGS_PER_PAGE)
+        }
+
+    async def _get_rendered_pages(self, container_id: str, version: int) -> Optional[dict]:
+        """Páginas da versão pedida; se a versão mudou, renderiza a atual e retorna sua versão"""
+        pages = _rendered_pages.get((container_id, version))
+        if pages is not None:
+            return {"version": version, "pages": pages}
+
+        view = await self.container_service.get_container_by_id(container_id)
+        if view is None:
+            return None
+        pages = self._render_pages(view)
+        _rendered_pages.set((container_id, view.version), pages)
+        return {"version": view.version, "pages": pages}
+
+    def _page_callback(self, container_id: str, version: int, kind: str, page: int) -> str:
+        data = f"{PAGE_CALLBACK_PREFIX}:{container_id}:{version}:{kind}:{page}"
+        if len(data.encode()) > CALLBACK_DATA_LIMIT:
+            raise ValueError("callback_data excede o limite do Telegram")
+        return data
+
+    def _page_keyboard(self, container_id: str, version: int, kind: str, page: int, total_pages: int) -> InlineKeyboardMarkup:
+        navigation = []
+        if kind != SUMMARY_PAGE:
+            if page > 0:
+                navigation.append(InlineKeyboardButton("⬅️", callback_data=self._page_callback(container_id, version, kind, page - 1)))
+            if page < total_pages - 1:
+                navigation.append(InlineKeyboardButton("➡️", callback_data=self._page_callback(container_id, version, kind, page + 1)))
+
+        sections = []
+        if kind != SUMMARY_PAGE:
+            sections.append(InlineKeyboardButton("📦 Resumo", callback_data=self._page_callback(container_id, version, SUMMARY_PAGE, 0)))
+        if kind != EVENTS_PAGE:
+            sections.append(InlineKeyboardButton("📝 Eventos", callback_data=self._page_callback(container_id, version, EVENTS_PAGE, 0)))
+        if kind != SEARCH_LOGS_PAGE:
+            sections.append(InlineKeyboardButton("📊 Buscas", callback_data=self._page_callback(container_id, version, SEARCH_LOGS_PAGE, 0)))
+
+        return InlineKeyboardMarkup([row for row in (navigation, sections) if row])
+
+    async def send_container_summary(self, update: Update, container_number: str):
+        revision = await self.container_service.find_revision_by_number(container_number)
+        rendered = await self._get_rendered_pages(*revision) if revision else None
+        if not rendered:
+            await update.message.reply_text(f"⚠️ Container {container_number} não encontrado. Tente novamente.")
+            return
+        container_id, _ = revision
+        await update.message.reply_text(
+            rendered["pages"][SUMMARY_PAGE][0],
+            parse_mode="Markdown",
+            reply_markup=self._page_keyboard(container_id, rendered["version"], SUMMARY_PAGE, 0, 1)
+        )
+
+    async def show_container_page(self, query, data: str):
+        match = PAGE_CALLBACK_PATTERN.match(data)
+        if not match:
+            # Botões antigos ou de outro formato: avisa em vez de falhar no handler
+            await query.answer("⚠️ Mensagem expirada, consulte o container novamente.", show_alert=True)
+            return
+        await query.answer()
+        container_id, version, kind, page = match.groups()
+        rendered = await self._get_rendered_pages(container_id, int(version))
+        if not rendered:
+            await query.edit_message_text("⚠️ Container não encontrado.")
+            return
+        pages = rendered["pages"].get(kind, rendered["pages"][SUMMARY_PAGE])
+        page = min(int(page), len(pages) - 1)
+        await query.edit_message_text(
+            pages[page],
+            parse_mode="Markdown",
+            reply_markup=self._page_keyboard(container_id, rendered["version"], kind, page, len(pages))
         )
 
+    async def subscribe_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not context.args:
+            await update.message.reply_text("Informe o número do container, ex: /inscrever MSCU1234567")
+            return
+        container_number = context.args[0].strip().upper()
+        # Um número recadastrado tem documentos antigos finalizados: inscreve no que está em acompanhamento
+        revision = await self.container_service.find_revision_by_number(container_number, processing_only=True)
+        if not revision:
+            await update.message.reply_text(f"⚠️ Container {container_number} não está em acompanhamento.")
+            return
+        container_id, _ = revision
+        created = await self.notification_service.subscribe(update.effective_chat.id, container_id, container_number)
+        if created:
+            await update.message.reply_text(f"🔔 Você será avisado das alterações do container {container_number}.")
+        else:
+            await update.message.reply_text(f"Você já acompanha o container {container_number}.")
+
+    async def unsubscribe_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if not context.args:
+            await update.message.reply_text("Informe o número do container, ex: /desinscrever MSCU1234567")
+            return
+        container_number = context.args[0].strip().upper()
+        if await self.notification_service.unsubscribe(update.effective_chat.id, container_number):
+            await update.message.reply_text(f"🔕 Você não receberá mais alterações do container {container_number}.")
+        else:
+            await update.message.reply_text(f"Você não acompanha o container {container_number}.")
+
+    async def subscriptions_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        container_numbers = await self.notification_service.list_subscriptions(update.effective_chat.id)
+        if not container_numbers:
+            await update.message.reply_text("Você não acompanha nenhum container. Use /inscrever <número>.")
+            return
+        await update.message.reply_text("🔔 Containers acompanhados:\n" + "\n".join(container_numbers))
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         keyboard = [[
             InlineKeyboardButton("Cadastrar Novo Container", callback_data='register_container'),
@@ -39,6 +174,10 @@ class TelegramBotService:
 
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
+        if query.data.startswith(f"{PAGE_CALLBACK_PREFIX}:"):
+            # A paginação responde o callback por conta própria, com aviso se os dados forem inválidos
+            await self.show_container_page(query, query.data)
+            return
         await query.answer()
 
         if query.data == "view_container":
@@ -57,11 +196,7 @@ class TelegramBotService:
             if not re.match(container_format, text):
                 await update.message.reply_text("⚠️ O número do container não está no formato correto. Tente novamente.")
                 return
-            container_info = await self.container_service.find_by_container_number_to_telegram(text)
-            if not container_info:
-                await update.message.reply_text(f"⚠️ Container {text} não encontrado. Tente novamente.")
-                return
-            await update.message.reply_text(container_info.to_telegram_chat(), parse_mode="Markdown")
+            await self.send_container_summary(update, text)
         elif action == "registering_container":
             if "container_number" not in context.user_data:
                 container_format = r"^[A-Z]{4}[0-9]{7}$"
@@ -118,5 +253,8 @@ class TelegramBotService:
 
     def setup_handlers(self, app):
         app.add_handler(CommandHandler("start", self.start_command))
+        app.add_handler(CommandHandler("inscrever", self.subscribe_command))
+        app.add_handler(CommandHandler("desinscrever", self.unsubscribe_command))
+        app.add_handler(CommandHandler("inscricoes", self.subscriptions_command))
         app.add_handler(CallbackQueryHandler(self.handle_callback))
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_container_message))